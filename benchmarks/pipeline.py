@@ -0,0 +1,280 @@
+'''Time the parse -> rollcall -> scale pipeline, and record the peak
+memory of each stage, on the bundled .ord fixtures and on synthetic
+vote matrices:
+
+    python benchmarks/pipeline.py --quick --output results.json
+    python benchmarks/pipeline.py --compare results.json
+
+The stages are OrdFile parsing (as_arrays), as_dataframe,
+Rollcall.from_dataframe, summary, drop_unanimous, wnominate and ideal.
+Each is run ``--repeat`` times and the fastest run is kept. Peak memory
+is the highest resident set size seen while the stage ran, less the
+size when it started, sampled from /proc/self/statm (or from getrusage
+where there's no /proc, which only sees new high-water marks).
+
+The results are written as JSON, with the commit and library versions,
+so runs from different commits can be compared with --compare. With
+--quick, only the two senate fixtures and a small synthetic matrix are
+used, and the scaling methods are run briefly; that takes well under a
+minute with the numpy engines.
+'''
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas
+from scipy.special import ndtr
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+from pscl.ordfile import OrdFile, FIELD_WIDTHS
+from pscl.rollcall import Rollcall
+
+
+FIXTURES = os.path.join(os.path.dirname(here), 'tests', 'fixtures')
+
+STAGES = ('parse', 'as_dataframe', 'from_dataframe', 'summary',
+          'drop_unanimous', 'wnominate', 'ideal')
+
+# (fixtures, synthetic (legislators, roll calls) sizes, wnominate and
+# ideal arguments) for each mode.
+MODES = dict(
+    quick=dict(
+        fixtures=('sen90kh.ord', 'sen109kh.ord'),
+        synthetic=((300, 600),),
+        wnominate=dict(dims=1, trials=1),
+        ideal=dict(d=1, maxiter=200, burnin=100, thin=10)),
+    full=dict(
+        fixtures=('sen90kh.ord', 'sen109kh.ord', 'hou112kh.ord'),
+        synthetic=((500, 2000), (2000, 5000)),
+        wnominate=dict(dims=2, trials=1),
+        ideal=dict(d=1, maxiter=10000, burnin=5000, thin=100)))
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def _resident_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except IOError:
+        # ru_maxrss is in kilobytes on linux (bytes on OS X).
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakMemory(object):
+    '''Sample the resident set size in a thread while the with block runs.
+    ``peak`` is then the largest increase seen, in bytes.
+    '''
+    def __init__(self, interval=0.001):
+        self.interval = interval
+
+    def __enter__(self):
+        gc.collect()
+        self.start = self.high = _resident_bytes()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._sample)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def _sample(self):
+        while not self.done.is_set():
+            self.high = max(self.high, _resident_bytes())
+            self.done.wait(self.interval)
+
+    def __exit__(self, *exc_info):
+        self.done.set()
+        self.thread.join()
+        self.high = max(self.high, _resident_bytes())
+        self.peak = self.high - self.start
+
+
+def measure(function, repeat=1):
+    '''Run ``function`` ``repeat`` times; return its last result, the
+    fastest time in seconds and the largest peak memory in bytes.
+    '''
+    times, peaks = [], []
+    for _ in range(repeat):
+        with PeakMemory() as memory:
+            start = time.time()
+            result = function()
+            times.append(time.time() - start)
+        peaks.append(memory.peak)
+    return result, min(times), max(peaks)
+
+
+def synthetic_ordfile(path, n, m, seed=0):
+    '''Write an .ord file of ``n`` legislators voting on ``m`` roll calls
+    by a one dimensional spatial model, with about 5% of the votes
+    missing and a tenth of the legislators serving half the term.
+    '''
+    random = np.random.RandomState(seed)
+    party = random.randint(2, size=n)
+    ideal_points = random.normal(np.where(party, 1.0, -1.0), 0.5)
+    cutpoints = random.uniform(-1.5, 1.5, size=m)
+    slopes = random.choice([-2.0, 2.0], size=m)
+    yea = random.uniform(size=(n, m)) < ndtr(
+        slopes * (ideal_points[:, np.newaxis] - cutpoints))
+
+    votes = np.where(yea, ord('1'), ord('6')).astype(np.uint8)
+    votes[random.uniform(size=(n, m)) < 0.05] = ord('9')
+    replaced = random.uniform(size=n) < 0.1
+    votes[replaced, :m // 2] = ord('0')
+
+    with open(path, 'wb') as f:
+        for row in range(n):
+            fields = dict(
+                congress_number='999', icpsr_id='%05d' % (row % 100000),
+                state_code='99', cong_district='00', state_name='SYNTH',
+                party_code='200' if party[row] else '100',
+                occupancy='0', attained_office='0', name='L%d' % row)
+            f.write(''.join(fields[field].ljust(width)[:width]
+                            for field, width in FIELD_WIDTHS))
+            f.write(votes[row].tostring())
+            f.write('\n')
+
+
+def _polarity(rollcall):
+    '''The (1-based) row of the legislator who cast the most yeas and
+    nays, which every fit keeps.
+    '''
+    rows, _, _ = rollcall.observed_votes()
+    return int(np.bincount(rows).argmax()) + 1
+
+
+def run_dataset(name, path, mode, engine, repeat):
+    '''Run every stage on the .ord file at ``path`` and return a list of
+    result dicts.
+    '''
+    settings = MODES[mode]
+    codes = dict(yea=[1, 2, 3], nay=[4, 5, 6], missing=[7, 8, 9],
+                 not_in_legis=0)
+    results = []
+
+    def record(stage, function, repeat=repeat):
+        value, seconds, peak = measure(function, repeat)
+        results.append(dict(stage=stage, seconds=seconds, peak_bytes=peak))
+        print('%-18s %-15s %9.3fs %9.1fMB' % (
+            name, stage, seconds, peak / 2.0 ** 20))
+        return value
+
+    def parse():
+        ordfile = OrdFile.from_path(path)
+        try:
+            return ordfile.as_arrays(np.int8)
+        finally:
+            ordfile.close()
+
+    def as_dataframe():
+        ordfile = OrdFile.from_path(path)
+        try:
+            return ordfile.as_dataframe()
+        finally:
+            ordfile.close()
+
+    record('parse', parse)
+    dataframe = record('as_dataframe', as_dataframe)
+    rollcall = record('from_dataframe', lambda: Rollcall.from_dataframe(
+        dataframe, engine=engine, **codes))
+    record('summary', lambda: rollcall.summary())
+    record('drop_unanimous',
+           lambda: Rollcall(rollcall.obj).drop_unanimous())
+
+    polarity = [_polarity(rollcall)] * settings['wnominate']['dims']
+    record('wnominate', lambda: rollcall.wnominate(
+        polarity, engine=engine, **settings['wnominate']), repeat=1)
+    record('ideal', lambda: rollcall.ideal(
+        engine=engine, **settings['ideal']), repeat=1)
+
+    n, m = dataframe.shape
+    for result in results:
+        result.update(dataset=name, legislators=n, rollcalls=m)
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=here,
+            stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(mode='quick', engine='numpy', repeat=3):
+    settings = MODES[mode]
+    results = []
+    for filename in settings['fixtures']:
+        results += run_dataset(
+            filename, os.path.join(FIXTURES, filename), mode, engine, repeat)
+
+    directory = tempfile.mkdtemp()
+    try:
+        for n, m in settings['synthetic']:
+            name = 'synthetic%dx%d' % (n, m)
+            path = os.path.join(directory, name + '.ord')
+            synthetic_ordfile(path, n, m)
+            results += run_dataset(name, path, mode, engine, repeat)
+            os.remove(path)
+    finally:
+        os.rmdir(directory)
+
+    return dict(
+        commit=_commit(), mode=mode, engine=engine, repeat=repeat,
+        time=time.strftime('%Y-%m-%dT%H:%M:%S'),
+        python=platform.python_version(), platform=platform.platform(),
+        numpy=np.__version__, pandas=pandas.__version__,
+        results=results)
+
+
+def compare(baseline, current):
+    '''Print the ratio of each stage's time and peak memory to the
+    baseline run's.
+    '''
+    before = dict(((result['dataset'], result['stage']), result)
+                  for result in baseline['results'])
+    print('\nCompared with %s:' % (baseline.get('commit') or 'baseline'))
+    for result in current['results']:
+        old = before.get((result['dataset'], result['stage']))
+        if old is None:
+            continue
+        print('%-18s %-15s time x%6.2f  memory %+9.1fMB' % (
+            result['dataset'], result['stage'],
+            result['seconds'] / max(old['seconds'], 1e-9),
+            (result['peak_bytes'] - old['peak_bytes']) / 2.0 ** 20))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--quick', action='store_true',
+                        help='run the small datasets and short fits only')
+    parser.add_argument('--engine', default='numpy', choices=('numpy', 'r'))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs of each fast stage (the best is kept)')
+    parser.add_argument('--output', help='write the results as JSON here')
+    parser.add_argument('--compare', help='a JSON file of earlier results')
+    args = parser.parse_args(argv)
+
+    results = run('quick' if args.quick else 'full', args.engine,
+                  args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 '''Descriptors that help access attributes from R types.
 '''
+from .convert import flatten, to_array, to_labeled_array
+
 
 class Accessor(object):
     '''A descriptor that behaves like a property, but converts an
@@ -16,33 +18,59 @@ class Accessor(object):
         self.key = _key
 
     def __get__(self, inst, type_=None):
-        self.inst = inst
-        return self.get_value()
+        '''Return the converted value, computing it only on first access.
+        Values are cached on the instance (see Wrapper.obj), not on the
+        descriptor, which is shared by every instance of the class.
+        '''
+        if inst is None:
+            return self
+        cache = inst._accessor_cache
+        cache_key = (type(self), self.key)
+        try:
+            return cache[cache_key]
+        except KeyError:
+            value = cache[cache_key] = self.get_value(inst)
+            return value
 
-    def get_raw(self):
-        return self.inst[self.key]
+    def get_raw(self, inst):
+        return inst[self.key]
 
-    def get_value(self):
-        value = self.get_raw()
-        # Then do something with it.
-        raise NotImplemented
+    def get_value(self, inst):
+        '''Convert the raw value; subclasses say how.
+        '''
+        raise NotImplementedError
 
 
 class ValueAccessor(Accessor):
     '''An accessor that casts an R vector to a list and pops
     off the last item.
     '''
-    def get_value(self):
-        value = self.get_raw()
-        return list(value).pop()
+    def get_value(self, inst):
+        value = self.get_raw(inst)
+        return list(flatten(value)).pop()
 
 
 class VectorAccessor(Accessor):
     '''An accessor that casts an R vector to a tuple.
     '''
-    def get_value(self):
-        value = self.get_raw()
-        return tuple(value)
+    def get_value(self, inst):
+        value = self.get_raw(inst)
+        return tuple(flatten(value))
 
 
+class ArrayAccessor(Accessor):
+    '''An accessor that returns an R vector as a numpy array, shaped like
+    the R object and sharing its memory where possible.
+    '''
+    def get_value(self, inst):
+        value = self.get_raw(inst)
+        return to_array(value)
+
 
+class LabeledArrayAccessor(Accessor):
+    '''An accessor that returns an R vector or matrix as a pandas Series
+    or DataFrame labeled with the R names or dimnames.
+    '''
+    def get_value(self, inst):
+        value = self.get_raw(inst)
+        return to_labeled_array(value)
@@ -1,10 +1,27 @@
-from rpy2 import robjects
+from .accessors import Accessor, ArrayAccessor
+from .utils import R
 
 
-def _iterable_to_R_type(iterable, c=robjects.r('c')):
+def _iterable_to_R_type(iterable):
     '''Pass (and unpack) an iterable into R's `c` function.
     '''
-    return c(*iterable)
+    return R.r['c'](*iterable)
+
+
+def _r_null():
+    return R.robjects.NULL
+
+
+class RFunction(object):
+    '''A descriptor for a function from one of the R packages on
+    utils.R, which is only loaded when the function is first used.
+    '''
+    def __init__(self, package, name):
+        self.package = package
+        self.name = name
+
+    def __get__(self, inst, type_=None):
+        return getattr(getattr(R, self.package), self.name)
 
 
 class Field(object):
@@ -16,11 +33,11 @@ class Field(object):
         '''A singleton for identifying unused function arguments.
         '''
 
+    # Python values and functions returning their R equivalents.
     _PYTHON_R_VALUES = (
-        (None, robjects.NULL),
+        (None, _r_null),
         )
 
-    c = robjects.r('c')
     _PYTHON_R_TYPES = (
         (tuple, _iterable_to_R_type),
         (list, _iterable_to_R_type),
@@ -68,7 +85,7 @@ class Field(object):
         # Return the value's R equivalent if one is defined.
         for python_val, r_val in self._PYTHON_R_VALUES:
             if val == python_val:
-                return r_val
+                return r_val()
 
         # Cast the value to an R type if one is defined.
         for type_, func in self._PYTHON_R_TYPES:
@@ -146,17 +163,95 @@ class Translator(object):
         return r_object
 
 
-class Wrapper(dict):
+def _object_keys(obj):
+    '''The names of the elements of an R list, or the keys of a mapping.
+    '''
+    if hasattr(obj, 'rx2'):
+        try:
+            return tuple(obj.names)
+        except TypeError:
+            # Unnamed lists have NULL names.
+            return ()
+    return tuple(obj.keys())
+
+
+def _object_item(obj, key):
+    if hasattr(obj, 'rx2'):
+        return obj.rx2(key)
+    return obj[key]
+
 
+class Wrapper(dict):
+    '''A dict-like view of an R list (or of a python mapping with the same
+    layout). Elements are fetched from the wrapped object the first time
+    they're looked up, rather than all at once.
+    '''
     def __init__(self, obj):
         self.obj = obj
 
-        # Provide python-like access to object attributes.
-        self.update(obj.iteritems())
+    @property
+    def obj(self):
+        return self._obj
+
+    @obj.setter
+    def obj(self, obj):
+        '''Replacing the wrapped object (e.g., in Rollcall.drop_unanimous)
+        discards the elements and values cached so far.
+        '''
+        self._obj = obj
+        self._keys = None
+        self._accessor_cache = {}
+        self.clear()
+
+    # Provide python-like access to object attributes.
+    def _get_keys(self):
+        if self._keys is None:
+            self._keys = _object_keys(self.obj)
+        return self._keys
+
+    def __missing__(self, key):
+        if key not in self._get_keys():
+            raise KeyError(key)
+        value = self[key] = _object_item(self.obj, key)
+        return value
+
+    def __contains__(self, key):
+        return key in self._get_keys()
+
+    def __iter__(self):
+        return iter(self._get_keys())
+
+    def __len__(self):
+        return len(self._get_keys())
+
+    def keys(self):
+        return list(self._get_keys())
+
+    def iteritems(self):
+        for key in self._get_keys():
+            yield key, self[key]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return [value for _, value in self.iteritems()]
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
 
     # Mute the horrific R repr method of rpy2.
     __repr__ = object.__repr__
 
+    @property
+    def arrays(self):
+        '''Array-returning versions of this wrapper's accessors, e.g.,
+        ``wnominate.legislators.arrays.coord1D``.
+        '''
+        return _Arrays(self)
+
     def _get_eq_vals(self):
         for attr in self.eq_attrs:
             try:
@@ -171,16 +266,46 @@ class Wrapper(dict):
         return tuple(self._get_eq_vals()) == tuple(other._get_eq_vals())
 
 
-class SubWrapper(Wrapper):
+class _Arrays(object):
+    '''Looks up attributes as numpy arrays instead of tuples. Names of
+    accessors defined on the wrapper are translated to their R keys;
+    anything else is used as the R key as is.
+    '''
+    def __init__(self, wrapper):
+        self.wrapper = wrapper
+
+    def __getattr__(self, name):
+        key = name
+        for cls in type(self.wrapper).__mro__:
+            member = cls.__dict__.get(name)
+            if isinstance(member, Accessor):
+                key = member.key
+                break
+        try:
+            return ArrayAccessor(key).__get__(self.wrapper, type(self.wrapper))
+        except KeyError:
+            raise AttributeError(name)
+
 
-    def __init__(self):
-        pass
+class SubWrapper(Wrapper):
+    '''Declared as an attribute of a wrapper class, wraps the element
+    ``key`` of each instance's object in a wrapper of its own.
+    '''
+    def __init__(self, obj=None):
+        if obj is not None:
+            Wrapper.__init__(self, obj)
 
     def __get__(self, inst, type_=None):
         '''Using this wrapper's key, get the corresponding value from the
-        encompassing wrapper instance, and update the descriptor with the
-        resulting data.
+        encompassing wrapper instance, and wrap it. The child wrapper is
+        cached on the instance along with its accessor values.
         '''
-        obj = self.obj = inst[self.key]
-        self.update(obj.iteritems())
-        return self
+        if inst is None:
+            return self
+        cache = inst._accessor_cache
+        cache_key = (type(self), self.key)
+        try:
+            return cache[cache_key]
+        except KeyError:
+            child = cache[cache_key] = type(self)(inst[self.key])
+            return child
@@ -0,0 +1,126 @@
+'''Scale many rollcalls at once in a pool of worker processes. Each worker
+imports R and the pscl and wnominate packages once, then takes jobs
+until there are none left, and results are yielded as they finish:
+
+    jobs = [Job('hou112kh.ord', polarity=(1, 2)),
+            Job(dataframe, key='sen', codes=dict(yea=[1], nay=[6]),
+                polarity=(3, 5), dims=1)]
+    for result in scale(jobs, workers=8):
+        if result.error is None:
+            print result.key, result.value.fits
+
+A job that fails doesn't stop the others; its result carries the
+formatted traceback as ``error`` instead.
+'''
+import traceback
+from collections import namedtuple
+from multiprocessing import Pool, cpu_count
+
+from pandas import DataFrame
+
+
+Result = namedtuple('Result', 'key value error')
+
+
+class Job(object):
+    '''One rollcall to scale. ``source`` may be the path of a .ord file, a
+    DataFrame of votes or a Rollcall. ``codes`` holds the yea, nay,
+    missing and not_in_legis arguments for Rollcall.from_dataframe if
+    the source is a DataFrame. ``method`` is 'wnominate' or 'ideal', and
+    any other keyword arguments (polarity, dims, engine, ...) are passed
+    on to it; the engine is also used to build the Rollcall. ``key``
+    names the job's result, and defaults to its position in the list.
+    '''
+    def __init__(self, source, key=None, method='wnominate', codes=None,
+                 **options):
+        self.source = source
+        self.key = key
+        self.method = method
+        self.codes = codes or {}
+        self.options = options
+
+    def portable(self):
+        '''Return a copy that can be sent to a worker process. Rollcalls
+        are sent as Rollcall.portable() and rebuilt there.
+        '''
+        from .rollcall import Rollcall
+        if not isinstance(self.source, Rollcall):
+            return self
+        return Job(self.source.portable(), key=self.key, method=self.method,
+                   **self.options)
+
+    def rollcall(self):
+        from .rollcall import Rollcall
+        engine = self.options.get('engine', 'r')
+        if isinstance(self.source, dict):
+            return Rollcall.from_portable(self.source, engine)
+        if isinstance(self.source, DataFrame):
+            return Rollcall.from_dataframe(
+                self.source, engine=engine, **self.codes)
+        with open(self.source) as f:
+            return Rollcall.from_ordfile(f, engine=engine)
+
+    def run(self):
+        from .ideal import ideal
+        from .wnominate import wnominate
+        methods = dict(ideal=ideal, wnominate=wnominate)
+        return methods[self.method](self.rollcall(), **self.options)
+
+
+def _initialize():
+    # Start R and load its packages before the first job arrives.
+    from .utils import R
+    R.load()
+
+
+def _run(item):
+    '''Run a job in a worker process, returning its result as the wrapper
+    class and a python copy of the object it wraps.
+    '''
+    from .convert import to_python
+    key, job = item
+    try:
+        result = job.run()
+        return key, (type(result), to_python(result.obj)), None
+    except Exception:
+        return key, None, traceback.format_exc()
+
+
+def _result(key, value, error):
+    if value is not None:
+        wrapper, obj = value
+        value = wrapper(obj)
+    return Result(key, value, error)
+
+
+def scale(jobs, workers=None):
+    '''Run the jobs (Job instances, or sources to fit with the default
+    options) in a pool of ``workers`` processes, one per CPU by default,
+    and yield a Result for each as soon as it's done. Results come back
+    in the order they finish.
+
+    Under python 2, don't start a pool while a module is being imported
+    (from a module's top level, say): the workers would inherit the
+    import lock and block on their first import.
+    '''
+    items = []
+    for index, job in enumerate(jobs):
+        if not isinstance(job, Job):
+            job = Job(job)
+        key = index if job.key is None else job.key
+        items.append((key, job.portable()))
+
+    workers = cpu_count() if workers is None else workers
+    if workers <= 1:
+        _initialize()
+        for item in items:
+            yield _result(*_run(item))
+        return
+
+    pool = Pool(min(workers, len(items)) or 1, _initialize)
+    try:
+        for output in pool.imap_unordered(_run, items):
+            yield _result(*output)
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,248 @@
+'''An opt-in on-disk cache of ideal and wnominate results:
+
+    cache = ResultCache('~/.cache/pscl', max_bytes=2 ** 30)
+    result = cache.wnominate(rollcall, polarity=(2, 5))
+
+Results are keyed by a hash of the vote matrix (values and labels), the
+rollcall's codes, the method and every argument it's called with, so a
+change to any of them is a miss. Each result is stored as one .npz file
+of plain arrays, and a hit is rebuilt as the same wrapper class around
+python objects, without R. Once the files take up more than
+``max_bytes``, the least recently used are deleted.
+'''
+import errno
+import hashlib
+import json
+import os
+import tempfile
+import time
+from zipfile import BadZipfile
+
+import numpy as np
+from pandas import DataFrame, Series
+from scipy import sparse
+
+from .base import Wrapper
+from .convert import to_python
+from .ideal import ideal, Ideal, MultiChainIdeal
+from .wnominate import wnominate, Wnominate
+
+
+_WRAPPERS = dict((wrapper.__name__, wrapper)
+                 for wrapper in (Ideal, MultiChainIdeal, Wnominate))
+
+# Temporary files older than this are left over from interrupted writes.
+_STALE_SECONDS = 60 * 60
+
+
+def _digest(value, sha):
+    '''Feed a stable description of ``value`` to the hash.
+    '''
+    if isinstance(value, Wrapper):
+        value = value.obj
+    if sparse.issparse(value):
+        value = value.tocsr()
+        if not value.has_sorted_indices:
+            value = value.sorted_indices()
+        value = ['csr', value.shape, value.data, value.indices, value.indptr]
+    if isinstance(value, DataFrame):
+        _digest(list(value.columns), sha)
+        _digest(list(value.index), sha)
+        value = value.values
+    elif isinstance(value, Series):
+        _digest(list(value.index), sha)
+        value = value.values
+    if isinstance(value, np.ndarray):
+        sha.update('%s%r' % (value.dtype.str, value.shape))
+        if value.dtype.kind == 'O':
+            _digest(value.tolist(), sha)
+        else:
+            sha.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, dict):
+        sha.update('{')
+        for key in sorted(value):
+            _digest(key, sha)
+            _digest(value[key], sha)
+        sha.update('}')
+    elif isinstance(value, (list, tuple)):
+        sha.update('[')
+        for item in value:
+            _digest(item, sha)
+        sha.update(']')
+    else:
+        sha.update(repr(value))
+
+
+def _method_name(method):
+    '''Name ``method`` by its module and qualified name (with the class of
+    a bound method), so that functions with the same name in different
+    places don't share results.
+    '''
+    qualname = getattr(method, '__qualname__', None)
+    if qualname is None:
+        owner = getattr(method, 'im_class', None)
+        qualname = method.__name__
+        if owner is not None:
+            qualname = '%s.%s' % (owner.__name__, qualname)
+    return '%s.%s' % (method.__module__, qualname)
+
+
+def result_key(method, rollcall, args=(), kwargs=None):
+    '''The hex digest that identifies a call of ``method`` on a rollcall.
+    '''
+    sha = hashlib.sha1()
+    _digest([method, rollcall.portable(), list(args), kwargs or {}], sha)
+    return sha.hexdigest()
+
+
+def _pack(value, arrays, path):
+    '''Store the arrays in ``value`` in ``arrays`` under names starting
+    with ``path``, and return a json-able description of its layout.
+    '''
+    if value is None:
+        return dict(type='none')
+    if isinstance(value, DataFrame):
+        columns = []
+        for number, column in enumerate(value.columns):
+            columns.append([column, _pack(
+                value[column].values, arrays, '%s/%d' % (path, number))])
+        return dict(type='frame', columns=columns,
+                    index=_pack(np.asarray(value.index), arrays, path + '/i'))
+    if isinstance(value, Series):
+        return dict(type='series', values=_pack(value.values, arrays, path),
+                    index=_pack(np.asarray(value.index), arrays, path + '/i'))
+    if isinstance(value, dict):
+        return dict(type='dict', items=[
+            [key, _pack(item, arrays, '%s/%s' % (path, key))]
+            for key, item in value.items()])
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        return dict(type='list', items=[
+            _pack(item, arrays, '%s/%d' % (path, number))
+            for number, item in enumerate(value)])
+
+    array = np.asarray(value)
+    if array.dtype.kind == 'O':
+        # Store labels and other python objects as strings.
+        array = np.array([str(item) for item in array.ravel()]).reshape(
+            array.shape)
+    arrays[path] = array
+    return dict(type='array', name=path)
+
+
+def _unpack(layout, arrays):
+    kind = layout['type']
+    if kind == 'none':
+        return None
+    if kind == 'array':
+        return arrays[layout['name']]
+    if kind == 'frame':
+        columns = [column for column, _ in layout['columns']]
+        return DataFrame(
+            dict((column, _unpack(item, arrays))
+                 for column, item in layout['columns']),
+            index=_unpack(layout['index'], arrays), columns=columns)
+    if kind == 'series':
+        return Series(_unpack(layout['values'], arrays),
+                      index=_unpack(layout['index'], arrays))
+    if kind == 'dict':
+        return dict((key, _unpack(item, arrays))
+                    for key, item in layout['items'])
+    return [_unpack(item, arrays) for item in layout['items']]
+
+
+class ResultCache(object):
+    '''Cache results as .npz files in the ``path`` directory, keeping
+    them under ``max_bytes`` in all.
+    '''
+    def __init__(self, path, max_bytes=2 ** 30):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+    def _filename(self, key):
+        return os.path.join(self.path, key + '.npz')
+
+    def get(self, key):
+        '''Return the cached result, or None. A file that can't be read
+        back (say, one left truncated by a full disk) is deleted and
+        counts as a miss.
+        '''
+        filename = self._filename(key)
+        try:
+            with open(filename, 'rb') as f:
+                arrays = np.load(f)
+                layout = json.loads(str(arrays['__layout__']))
+                arrays = dict(arrays.items())
+            wrapper = _WRAPPERS[layout['wrapper']]
+            result = wrapper(_unpack(layout['obj'], arrays))
+        except IOError as error:
+            if error.errno != errno.ENOENT:
+                self._discard(filename)
+            return None
+        except (BadZipfile, ValueError, KeyError):
+            self._discard(filename)
+            return None
+        # Mark it as recently used.
+        os.utime(filename, None)
+        return result
+
+    def _discard(self, filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            # Another process got to it first.
+            pass
+
+    def put(self, key, result):
+        '''Store a result, then evict the least recently used results if
+        the cache has grown too big.
+        '''
+        arrays = {}
+        layout = dict(wrapper=type(result).__name__,
+                      obj=_pack(to_python(result.obj), arrays, 'obj'))
+        arrays['__layout__'] = np.array(json.dumps(layout))
+
+        # Write to a temporary file first so readers never see half of it.
+        handle, temporary = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as f:
+            np.savez(f, **arrays)
+        os.rename(temporary, self._filename(key))
+        self.evict()
+
+    def evict(self):
+        '''Delete the least recently used results until the cache fits in
+        ``max_bytes``, and any temporary files left by interrupted writes.
+        '''
+        entries = []
+        stale = time.time() - _STALE_SECONDS
+        for name in os.listdir(self.path):
+            filename = os.path.join(self.path, name)
+            if name.endswith('.npz'):
+                stat = os.stat(filename)
+                entries.append((stat.st_mtime, stat.st_size, name))
+            elif name.endswith('.tmp') and os.stat(filename).st_mtime < stale:
+                self._discard(filename)
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.path, name))
+            total -= size
+
+    def apply(self, method, rollcall, *args, **kwargs):
+        '''Return ``method(rollcall, *args, **kwargs)`` from the cache,
+        computing and storing it on a miss.
+        '''
+        key = result_key(_method_name(method), rollcall, args, kwargs)
+        result = self.get(key)
+        if result is None:
+            result = method(rollcall, *args, **kwargs)
+            self.put(key, result)
+        return result
+
+    def wnominate(self, rollcall, polarity, **kwargs):
+        return self.apply(wnominate, rollcall, polarity, **kwargs)
+
+    def ideal(self, rollcall, **kwargs):
+        return self.apply(ideal, rollcall, **kwargs)
@@ -0,0 +1,177 @@
+'''Bulk conversions between numpy/pandas and R types.
+'''
+import numpy as np
+from pandas import DataFrame, Series
+
+from .utils import R
+
+
+def _r_vector(values):
+    '''Copy a 1-D int32 or float64 array into a new R vector in one go.
+    '''
+    # rpy2 exposes the memory of an R vector through the numpy array
+    # interface, so allocate the vector in R and fill it through that view.
+    if values.dtype == np.int32:
+        vector = R.r['integer'](len(values))
+    else:
+        vector = R.r['numeric'](len(values))
+    np.asarray(vector)[:] = values
+    return vector
+
+
+def _r_names(names):
+    if names is None:
+        return R.robjects.NULL
+    return R.robjects.StrVector([str(name) for name in names])
+
+
+def to_r_matrix(matrix, rownames=None, colnames=None, integer=None):
+    '''Send a 2-D array or pandas.DataFrame to R as an R matrix. Integer and
+    boolean arrays become integer matrices, everything else becomes a
+    numeric matrix, unless ``integer`` says otherwise. The values are
+    copied as one contiguous buffer instead of element by element.
+
+    If ``matrix`` is a DataFrame, its index and columns are used as the
+    dimnames unless ``rownames`` or ``colnames`` are given.
+    '''
+    if isinstance(matrix, DataFrame):
+        if rownames is None:
+            rownames = matrix.index
+        if colnames is None:
+            colnames = matrix.columns
+        matrix = matrix.values
+    matrix = np.asarray(matrix)
+    if integer is None:
+        integer = matrix.dtype.kind in 'biu'
+    dtype = np.int32 if integer else np.float64
+
+    # R matrices are column-major, so flatten in fortran order.
+    values = np.ravel(matrix.astype(dtype, copy=False), order='F')
+    nrow, ncol = matrix.shape
+    dimnames = R.r.list(_r_names(rownames), _r_names(colnames))
+    return R.r.matrix(
+        _r_vector(values), nrow=nrow, ncol=ncol, dimnames=dimnames)
+
+
+_DATA_FRAME = '''
+    function(columns, names, rownames) {
+        names(columns) <- names
+        data.frame(columns, row.names=rownames, check.names=FALSE,
+                   stringsAsFactors=FALSE)
+    }
+'''
+
+
+def _r_column(values):
+    values = np.asarray(values)
+    if values.dtype.kind == 'b':
+        return R.robjects.BoolVector(values)
+    if values.dtype.kind in 'iu':
+        return _r_vector(values.astype(np.int32))
+    if values.dtype.kind == 'f':
+        return _r_vector(values.astype(np.float64))
+    return R.robjects.StrVector([str(value) for value in values])
+
+
+def to_r_data_frame(frame):
+    '''Send a pandas.DataFrame to R as a data.frame, one vector per
+    column, with its index as the row names. Columns that aren't
+    numeric or boolean become character vectors.
+    '''
+    columns = R.r.list(*[_r_column(frame[column].values)
+                         for column in frame.columns])
+    return R.r(_DATA_FRAME)(
+        columns, _r_names(frame.columns), _r_names(frame.index))
+
+
+def _r_attribute(r_object, name):
+    try:
+        return r_object.do_slot(name)
+    except (AttributeError, LookupError):
+        return None
+
+
+def _r_tuple(vector):
+    try:
+        return tuple(vector)
+    except TypeError:
+        # R's NULL isn't iterable.
+        return None
+
+
+def flatten(value):
+    '''Flatten numpy arrays and pandas objects in column-major order, the
+    way R iterates over its matrices. Anything else is returned as is.
+    '''
+    if isinstance(value, (np.ndarray, DataFrame, Series)):
+        return np.ravel(np.asarray(value), order='F')
+    return value
+
+
+def to_array(vector):
+    '''Return an R vector as a numpy array. Numeric vectors are returned
+    as views on the R vector's memory where rpy2 allows it, and R
+    matrices and arrays keep their shape.
+    '''
+    if isinstance(vector, (DataFrame, Series)):
+        return vector.values
+    # rpy2 vectors implement the numpy array interface.
+    array = np.asarray(vector)
+
+    dim = _r_attribute(vector, 'dim')
+    if dim is not None:
+        array = array.reshape(tuple(dim), order='F')
+    return array
+
+
+def to_labeled_array(vector):
+    '''Like to_array, but returns a pandas.Series or DataFrame labeled with
+    the R vector's names or dimnames, when it has them.
+    '''
+    if isinstance(vector, (DataFrame, Series)):
+        return vector
+    array = to_array(vector)
+    if array.ndim == 1:
+        names = _r_attribute(vector, 'names')
+        if names is None:
+            return array
+        return Series(array, index=_r_tuple(names), copy=False)
+    if array.ndim == 2:
+        dimnames = _r_attribute(vector, 'dimnames')
+        if dimnames is None:
+            return array
+        rownames, colnames = [_r_tuple(names) for names in dimnames]
+        return DataFrame(array, index=rownames, columns=colnames, copy=False)
+    return array
+
+
+def _r_test(name, value):
+    return bool(R.r[name](value)[0])
+
+
+def to_python(value):
+    '''Copy an R object into python objects that don't need R and can be
+    pickled: data frames become DataFrames, other lists become dicts of
+    their elements (or lists, if they're unnamed), factors become arrays
+    of their labels and other vectors are returned as by
+    to_labeled_array. Python objects are returned as they are.
+    '''
+    if not hasattr(value, 'rclass'):
+        return value
+    if value is R.robjects.NULL or _r_test('is.null', value):
+        return None
+    if _r_test('is.data.frame', value):
+        columns = list(value.names)
+        return DataFrame(
+            dict((name, np.array(to_python(column)))
+                 for name, column in zip(columns, value)),
+            index=list(R.r['rownames'](value)), columns=columns)
+    if _r_test('is.list', value):
+        names = _r_tuple(value.names)
+        elements = [to_python(element) for element in value]
+        if names is None:
+            return elements
+        return dict(zip(names, elements))
+    if _r_test('is.factor', value):
+        return np.array(R.r['as.character'](value))
+    return to_labeled_array(value)
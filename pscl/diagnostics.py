@@ -0,0 +1,44 @@
+'''Convergence diagnostics for MCMC draws from several chains. Both
+functions take an array of draws shaped (chains x iterations x ...) and
+compute the statistic for every parameter at once.
+'''
+import numpy as np
+
+
+def _variances(draws):
+    iterations = draws.shape[1]
+    within = draws.var(axis=1, ddof=1).mean(axis=0)
+    between = iterations * draws.mean(axis=1).var(axis=0, ddof=1)
+    pooled = (iterations - 1.0) / iterations * within + between / iterations
+    return within, pooled
+
+
+def rhat(draws):
+    '''The Gelman-Rubin potential scale reduction factor. Values near 1
+    suggest the chains have converged to the same distribution.
+    '''
+    within, pooled = _variances(draws)
+    return np.sqrt(pooled / within)
+
+
+def effective_size(draws):
+    '''The effective number of independent draws, pooling the chains. The
+    autocorrelations are computed with FFTs and summed in pairs until a
+    pair turns negative (Geyer's initial positive sequence).
+    '''
+    chains, iterations = draws.shape[:2]
+    centered = draws - draws.mean(axis=1)[:, np.newaxis]
+    size = 2 ** int(np.ceil(np.log2(2 * iterations)))
+    transformed = np.fft.rfft(centered, n=size, axis=1)
+    autocovariance = np.fft.irfft(
+        transformed * np.conjugate(transformed), n=size, axis=1)
+    autocovariance = autocovariance[:, :iterations] / iterations
+
+    within, pooled = _variances(draws)
+    rho = 1 - (within - autocovariance.mean(axis=0)) / pooled
+
+    npairs = iterations // 2
+    pairs = rho[:2 * npairs].reshape((npairs, 2) + rho.shape[1:]).sum(axis=1)
+    positive = np.cumprod(pairs > 0, axis=0)
+    tau = -1 + 2 * (pairs * positive).sum(axis=0)
+    return chains * iterations / tau
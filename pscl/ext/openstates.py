@@ -1,75 +1,282 @@
-import logging
-from collections import defaultdict
+import hashlib
+import json
+import os
+import tempfile
+from array import array
+from multiprocessing.pool import ThreadPool
 
+import numpy as np
 from pscl import Rollcall
 from pandas import DataFrame
+from scipy.sparse import coo_matrix
 
 
 class RollcallBuilder(object):
     '''Provides an easy(ish) way to build a rollcall object from
     the Open States API.
+
+    Legislator and vote ids are numbered in the order they're first
+    seen, and each vote cast is kept as a (row, column, code) triple in
+    typed arrays, a few bytes apiece; the matrix is only filled in by
+    get_rollcall. If a legislator's vote on a roll call is added more
+    than once, the last one counts.
+
+    The numbering only ever grows, and can be saved with save_index and
+    picked up by a later build with from_index (or by passing the
+    ``leg_ids`` and ``vote_ids`` of an earlier build). The legislators
+    and roll calls seen before then keep their rows and columns, and new
+    ones are added after them, so rebuilt matrices line up with earlier
+    ones.
     '''
-    def __init__(self, valid_ids, YES=1, NO=2, OTHER=3, NA=0):
-        self.votedata = defaultdict(dict)
+    def __init__(self, valid_ids, YES=1, NO=2, OTHER=3, NA=0, leg_ids=(),
+                 vote_ids=()):
         self.YES = float(YES)
         self.NO = float(NO)
         self.OTHER = float(OTHER)
         self.NA = float(NA)
+        self.vote_keys = ('yes_votes', 'no_votes', 'other_votes')
         self.vote_vals = dict(
             yes_votes=self.YES,
             no_votes=self.NO,
             other_votes=self.OTHER)
-        self.valid_ids = valid_ids
-        self.leg_ids = set()
+        self.valid_ids = frozenset(valid_ids)
+        self.leg_index = dict((id, row) for row, id in enumerate(leg_ids))
+        self.vote_index = dict(
+            (id, col) for col, id in enumerate(vote_ids))
+        if (len(self.leg_index) != len(leg_ids) or
+                len(self.vote_index) != len(vote_ids)):
+            raise ValueError('The legislator and vote ids must be unique.')
+        self.rows = array('i')
+        self.cols = array('i')
+        self.codes = array('b')
+
+    @classmethod
+    def from_index(cls, path, valid_ids, **kwargs):
+        '''Start a builder from the ids saved by save_index, if ``path``
+        exists, or from scratch.
+        '''
+        if os.path.exists(path):
+            with open(path) as f:
+                index = json.load(f)
+            kwargs.update(
+                leg_ids=index['leg_ids'], vote_ids=index['vote_ids'])
+        return cls(valid_ids, **kwargs)
+
+    def save_index(self, path):
+        '''Save the legislator and vote ids, in row and column order, as
+        JSON.
+        '''
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(dict(leg_ids=self.leg_ids, vote_ids=self.vote_ids), f)
+        os.rename(temp, path)
+
+    @property
+    def leg_ids(self):
+        return _ordered(self.leg_index)
+
+    @property
+    def vote_ids(self):
+        return _ordered(self.vote_index)
 
     def add_vote(self, vote):
-        vote_keys = 'yes_votes, no_votes, other_votes'.split(', ')
         valid_ids = self.valid_ids
-        vote_vals = self.vote_vals
-        leg_ids = self.leg_ids
-        for k in vote_keys:
+        leg_index = self.leg_index
+        rows, cols, codes = self.rows, self.cols, self.codes
+        col = None
+        for code, k in enumerate(self.vote_keys):
             for voter in vote[k]:
                 leg_id = voter['leg_id']
-                if leg_id is None:
-                    continue
-                if leg_id not in valid_ids:
+                if leg_id is None or leg_id not in valid_ids:
                     continue
-                leg_ids.add(leg_id)
-                self.votedata[vote['id']][leg_id] = vote_vals[k]
+                if col is None:
+                    col = self.vote_index.setdefault(
+                        vote['id'], len(self.vote_index))
+                rows.append(leg_index.setdefault(leg_id, len(leg_index)))
+                cols.append(col)
+                codes.append(code)
+
+    def _triples(self):
+        '''Return the rows, columns and values of the votes, keeping
+        only the last vote added for each cell, in row-major order.
+        '''
+        rows = np.frombuffer(self.rows, dtype=np.intc)
+        cols = np.frombuffer(self.cols, dtype=np.intc)
+        codes = np.frombuffer(self.codes, dtype=np.int8)
+        cells = rows.astype(np.int64) * len(self.vote_index) + cols
+        _, last = np.unique(cells[::-1], return_index=True)
+        last = len(cells) - 1 - last
+        values = np.array([self.vote_vals[k] for k in self.vote_keys])
+        return rows[last], cols[last], values[codes[last]]
+
+    def get_rollcall(self, sparse=False):
+        '''Build the Rollcall. With sparse=True, the votes are kept in a
+        scipy.sparse matrix holding only the votes cast, and the rollcall
+        is built in python (engine='numpy'); the legislators who didn't
+        vote on a roll call are left implicit, as not in legislature. The
+        implicit cells of a sparse matrix are 0, so NA must be too.
+        '''
+        rows, cols, values = self._triples()
+        shape = (len(self.leg_index), len(self.vote_index))
+        if sparse:
+            if self.NA != 0:
+                raise ValueError(
+                    'NA must be 0 to build a sparse rollcall, not %g.' %
+                    self.NA)
+            return Rollcall.from_dataframe(
+                coo_matrix((values, (rows, cols)), shape=shape),
+                engine='numpy',
+                yea=[self.YES],
+                nay=[self.NO],
+                missing=[self.OTHER],
+                not_in_legis=self.NA,
+                legis_names=self.leg_ids,
+                vote_names=self.vote_ids)
 
-    def get_rollcall(self):
-        # Convert the dict into a pandas DataFrame.
-        dataframe = DataFrame(self.votedata, index=self.leg_ids)
-        dataframe = dataframe.fillna(value=self.NA)
+        votes = np.full(shape, self.NA)
+        votes[rows, cols] = values
+        dataframe = DataFrame(
+            votes, index=self.leg_ids, columns=self.vote_ids, copy=False)
 
         # Create a rollcall object similar to pscl's.
         rollcall = Rollcall.from_dataframe(dataframe,
             yea=[self.YES],
             nay=[self.NO],
             missing=[self.OTHER],
-            not_in_legis=0.0,
+            not_in_legis=self.NA,
             legis_names=tuple(self.leg_ids))
 
         return rollcall
 
 
-if __name__ == '__main__':
-    from sunlight import openstates, response_cache
-    response_cache.enable('mongo')
-    response_cache.logger.setLevel(10)
+def _ordered(index):
+    '''Return the keys of a {key: number} mapping in number order.'''
+    keys = [None] * len(index)
+    for key, number in index.iteritems():
+        keys[number] = key
+    return keys
 
-    # Wrangle the API data into a Rollcall object.
-    spec = dict(state='al', chamber='lower', search_window='term:2011-2014')
-    valid_ids = [leg['id'] for leg in openstates.legislators(**spec)]
-    builder = RollcallBuilder(valid_ids)
-    bills = openstates.bills(**spec)
-    for bill in bills:
-        bill = openstates.bill(bill['id'])
+
+def sunlight_fetch(method, *args, **kwargs):
+    '''Call the Open States API through the sunlight package, e.g.
+    sunlight_fetch('bill', bill_id). This is the default fetch function;
+    any function that takes the same arguments and returns the decoded
+    JSON will do.
+    '''
+    from sunlight import openstates
+    return getattr(openstates, method)(*args, **kwargs)
+
+
+class ResponseCache(object):
+    '''Wraps a fetch function, keeping each response on disk as a JSON
+    file named by a hash of the request, so only requests it hasn't seen
+    are fetched. The methods in ``refresh`` (e.g. 'bills', to pick up new
+    bills) are always fetched again and their files replaced.
+
+    A request can also be given a ``version``, such as the updated_at
+    time of a bill in a listing. The version is stored with the response,
+    which is fetched again, replacing the old one, when the version
+    changes. That is how iter_bills picks up new votes on bills it has
+    seen before, while keeping one file per bill.
+    '''
+    def __init__(self, fetch, path, refresh=()):
+        self.fetch = fetch
+        self.path = os.path.expanduser(path)
+        self.refresh = frozenset(refresh)
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+    def filename(self, method, args, kwargs):
+        request = json.dumps([method, args, sorted(kwargs.items())])
+        return os.path.join(
+            self.path, hashlib.sha1(request).hexdigest() + '.json')
+
+    def __call__(self, method, *args, **kwargs):
+        return self.versioned(None, method, *args, **kwargs)
+
+    def versioned(self, version, method, *args, **kwargs):
+        filename = self.filename(method, args, kwargs)
+        if method not in self.refresh and os.path.exists(filename):
+            with open(filename) as f:
+                cached = json.load(f)
+            if version is None:
+                return cached
+            if isinstance(cached, dict) and cached.get(
+                    '__version__') == version:
+                return cached['response']
+        response = self.fetch(method, *args, **kwargs)
+        if version is None:
+            stored = response
+        else:
+            stored = {'__version__': version, 'response': response}
+
+        # Write to a temporary file first, so that other threads and
+        # processes never see part of a response.
+        fd, temp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(stored, f)
+        os.rename(temp, filename)
+        return response
+
+
+def iter_bills(spec, fetch=sunlight_fetch, workers=8):
+    '''Yield the full document of every bill matching ``spec`` (the
+    arguments of openstates.bills), fetching up to ``workers`` of them at
+    once. Bills are yielded in the order they're listed, each as soon as
+    it and the ones before it have arrived. A ResponseCache keys each
+    bill by its updated_at time in the listing, so bills that have
+    changed are fetched again.
+    '''
+    bills = fetch('bills', **spec)
+    versioned = getattr(fetch, 'versioned', None)
+
+    def fetch_bill(bill):
+        if versioned is None:
+            return fetch('bill', bill['id'])
+        return versioned(bill.get('updated_at'), 'bill', bill['id'])
+
+    pool = ThreadPool(workers)
+    try:
+        for bill in pool.imap(fetch_bill, bills):
+            yield bill
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def build(spec, fetch=sunlight_fetch, workers=8, cache=None, builder=None):
+    '''Fetch the legislators and bills matching ``spec`` and add every
+    vote taken in the bill's own chamber to a RollcallBuilder, returning
+    the builder. If ``cache`` is a directory, responses are kept there
+    (see ResponseCache) and only new requests go to ``fetch``; pass a
+    ResponseCache to choose what's refreshed.
+    '''
+    if isinstance(cache, basestring):
+        cache = ResponseCache(fetch, cache)
+    if cache is not None:
+        fetch = cache
+    if builder is None:
+        legislators = fetch('legislators', **spec)
+        builder = RollcallBuilder([leg['id'] for leg in legislators])
+    for bill in iter_bills(spec, fetch, workers):
         for vote in bill['votes']:
             if vote['chamber'] != bill['chamber']:
                 continue
             builder.add_vote(vote)
+    return builder
 
+
+if __name__ == '__main__':
+    # Wrangle the API data into a Rollcall object.
+    spec = dict(state='al', chamber='lower', search_window='term:2011-2014')
+    cache = ResponseCache(
+        sunlight_fetch, '~/.cache/pscl/openstates', refresh=['bills'])
+    index = os.path.join(cache.path, 'index.json')
+    valid_ids = [leg['id'] for leg in cache('legislators', **spec)]
+    builder = RollcallBuilder.from_index(index, valid_ids)
+    build(spec, cache=cache, builder=builder)
+    builder.save_index(index)
     rollcall = builder.get_rollcall()
 
     wnominate = rollcall.wnominate(polarity=('ALL000086', 'ALL000085'))
@@ -77,4 +284,3 @@ if __name__ == '__main__':
 
     ideal = rollcall.ideal()
     ideal_values = ideal.xbar
-    import pdb; pdb.set_trace()
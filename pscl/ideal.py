@@ -1,10 +1,10 @@
-from rpy2.robjects.packages import importr
+import numpy as np
+from pandas import DataFrame
 
-from .base import Translator, Wrapper
-from .accessors import ValueAccessor, VectorAccessor
-
-
-rpscl = importr('pscl')
+from .base import RFunction, Translator, Wrapper
+from .accessors import ValueAccessor, VectorAccessor, LabeledArrayAccessor
+from .convert import flatten, to_array, to_labeled_array
+from .utils import R
 
 
 class Ideal(Wrapper):
@@ -18,13 +18,25 @@ class Ideal(Wrapper):
 
     @property
     def xbar(self):
-        leg_ids = tuple(self['xbar'].rownames)
-        mcmc_values = tuple(self['xbar'])
+        xbar = to_labeled_array(self['xbar'])
+        leg_ids = tuple(xbar.index)
+        mcmc_values = tuple(flatten(xbar))
         return dict(zip(leg_ids, mcmc_values))
 
 
+class MultiChainIdeal(Ideal):
+    '''The pooled result of several ideal chains. ``x`` holds the draws of
+    all chains, one after another, and xbar their mean. ``rhat`` and
+    ``n_eff`` give the Gelman-Rubin statistic and the effective sample
+    size of each legislator's ideal point in each dimension.
+    '''
+    chains = ValueAccessor('chains')
+    rhat = LabeledArrayAccessor('rhat')
+    n_eff = LabeledArrayAccessor('n_eff')
+
+
 class _IdealTranslator(Translator):
-    r_type = rpscl.ideal
+    r_type = RFunction('pscl', 'ideal')
     wrapper = Ideal
 
     field_names = (
@@ -45,5 +57,107 @@ class _IdealTranslator(Translator):
         ('file_', 'file'))
 
 
-def ideal(rollcall, **kwargs):
-    return _IdealTranslator(obj=rollcall.obj, **kwargs).r_object()
+def ideal(rollcall, engine='r', chains=1, workers=None, **kwargs):
+    '''Estimate ideal points with pscl's ideal function. With
+    engine='numpy', the same model is fit by the native sampler in
+    pscl.irt, which doesn't need R; see _native_ideal for the arguments
+    it supports.
+
+    If ``chains`` is more than 1, that many chains are run in a pool of
+    ``workers`` processes (one per chain by default), and the result is
+    a MultiChainIdeal.
+    '''
+    if chains > 1:
+        return _multichain_ideal(rollcall, engine, chains, workers, kwargs)
+    if engine == 'numpy':
+        return _native_ideal(rollcall, **kwargs)
+    return _IdealTranslator(obj=rollcall.r_obj, **kwargs).r_object()
+
+
+def _native_ideal(rollcall, d=1, maxiter=10000, thin=100, burnin=5000,
+                  priors=None, startvals=None, normalize=False,
+                  store_item=False, seed=None, verbose=False):
+    '''Fit the model with pscl.irt. As with pscl's default dropList,
+    unanimous roll calls are left out. ``priors`` is a dict with any of
+    the keys xp, xpv, bp and bpv; ``startvals`` an (n x d) array.
+    '''
+    from . import irt
+    legis_names, vote_names = rollcall.legis_names, rollcall.vote_names
+    n = len(legis_names)
+    rollcall, _, kept = rollcall.filter()
+    rows, cols, yea = rollcall.observed_votes()
+    m = len(kept)
+
+    result = irt.ideal(
+        rows, cols, yea, n, m, d=d, maxiter=maxiter, thin=thin,
+        burnin=burnin, priors=priors, startvals=startvals,
+        normalize=normalize, store_item=store_item, seed=seed)
+
+    dims = ['D%d' % (dim + 1) for dim in range(d)]
+    result.update(
+        xbar=DataFrame(result['xbar'], index=legis_names, columns=dims),
+        n=np.array([n]), m=np.array([m]), d=np.array([d]))
+    if store_item:
+        result['betabar'] = DataFrame(
+            result['betabar'], index=vote_names[kept],
+            columns=dims + ['Difficulty'])
+    return Ideal(result)
+
+
+def _run_chain(args):
+    '''Run one chain in a worker process, starting from the python side
+    of the rollcall, and return its draws as arrays.
+    '''
+    from .rollcall import Rollcall
+    engine, portable, kwargs, seed = args
+    rollcall = Rollcall.from_portable(portable, engine)
+
+    if engine == 'numpy':
+        result = ideal(rollcall, engine=engine, seed=seed, **kwargs)
+    else:
+        R.r['set.seed'](seed)
+        result = ideal(rollcall, engine=engine, **kwargs)
+    xbar = to_labeled_array(result['xbar'])
+    return dict(
+        x=np.array(to_array(result['x'])).reshape(-1, len(xbar), result.d),
+        names=list(xbar.index), n=result.n, m=result.m, d=result.d)
+
+
+def _multichain_ideal(rollcall, engine, chains, workers, kwargs):
+    from multiprocessing import Pool
+    from .diagnostics import rhat, effective_size
+    seed = kwargs.pop('seed', None)
+    if seed is None:
+        seed = np.random.randint(2 ** 30)
+    portable = rollcall.portable()
+    jobs = [(engine, portable, kwargs, seed + chain)
+            for chain in range(chains)]
+
+    workers = chains if workers is None else workers
+    if workers > 1:
+        pool = Pool(min(workers, chains))
+        try:
+            results = pool.map(_run_chain, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = list(map(_run_chain, jobs))
+
+    first = results[0]
+    draws = np.array([result['x'] for result in results])
+    dims = ['D%d' % (dim + 1) for dim in range(first['d'])]
+
+    def frame(values):
+        return DataFrame(values, index=first['names'], columns=dims)
+
+    pooled = draws.reshape((-1,) + draws.shape[2:])
+    return MultiChainIdeal(dict(
+        x=pooled,
+        xbar=frame(pooled.mean(axis=0)),
+        rhat=frame(rhat(draws)),
+        n_eff=frame(effective_size(draws)),
+        chains=np.array([chains]),
+        n=np.array([first['n']]),
+        m=np.array([first['m']]),
+        d=np.array([first['d']])))
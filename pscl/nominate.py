@@ -0,0 +1,456 @@
+'''A native (numpy/scipy) version of the W-NOMINATE estimator fit by the R
+wnominate package (Poole and Rosenthal; Poole 2005).
+
+Legislator i votes yea on roll call j with probability
+
+    Phi(beta * (exp(-sum(w**2 * (x_i - z_j + d_j)**2) / 2) -
+                exp(-sum(w**2 * (x_i - z_j - d_j)**2) / 2)))
+
+where z_j is the roll call's midpoint, z_j - d_j and z_j + d_j are the
+yea and nay outcomes, and w holds the dimension weights. As in
+W-NOMINATE, the first weight is held fixed, legislators are kept inside
+the unit sphere, and estimation alternates between the roll call
+parameters, beta and the weights, and the legislator coordinates.
+
+The likelihood of every cast vote is evaluated at once as array
+operations. The roll call and legislator blocks are fit by Fisher
+scoring: the per-roll call (or per-legislator) gradients and
+information matrices are accumulated with bincount and every group's
+step is solved as one stack of small linear systems, halving the step
+only for the groups it made worse and evaluating only their votes
+again. Beta and the weights are fit by L-BFGS.
+
+Votes are passed as three parallel arrays of (legislator, roll call, yea)
+for the yeas and nays actually cast.
+'''
+import numpy as np
+from scipy.optimize import minimize
+from scipy.sparse import coo_matrix
+from scipy.special import log_ndtr
+
+
+_LOG_SQRT_2PI = 0.5 * np.log(2 * np.pi)
+
+MIDPOINT_BOUND = 1.0
+SPREAD_BOUND = 2.0
+BETA_BOUNDS = (0.1, 100.0)
+WEIGHT_BOUNDS = (0.01, 10.0)
+
+# Small ridge on the scoring information matrices, and limits on the
+# scoring steps per block and on the step halvings per step.
+_RIDGE = 1e-6
+_MAX_STEPS = 50
+_MAX_HALVINGS = 10
+
+
+def _group_sums(groups, values, size):
+    '''Sum the rows of ``values`` within each group.
+    '''
+    return np.column_stack([
+        np.bincount(groups, values[:, k], minlength=size)
+        for k in range(values.shape[1])])
+
+
+def start_coordinates(rows, cols, yea, n, m, dims):
+    '''Start the legislators at the leading eigenvectors of the double-
+    centered matrix of squared disagreement scores, scaled into the unit
+    sphere. Returns the coordinates and all of the eigenvalues.
+    '''
+    def incidence(side):
+        return coo_matrix(
+            (np.ones(side.sum()), (rows[side], cols[side])),
+            shape=(n, m)).tocsr()
+
+    yeas, nays = incidence(yea), incidence(~yea)
+    cast = yeas + nays
+
+    agreements = (yeas.dot(yeas.T) + nays.dot(nays.T)).toarray()
+    together = cast.dot(cast.T).toarray()
+    agreement = agreements / np.maximum(together, 1)
+
+    distance = (1 - agreement) ** 2
+    centered = (distance - distance.mean(axis=0) -
+                distance.mean(axis=1)[:, np.newaxis] + distance.mean())
+    eigenvalues, eigenvectors = np.linalg.eigh(-0.5 * centered)
+    order = np.argsort(-eigenvalues)
+    eigenvalues = eigenvalues[order]
+
+    coords = eigenvectors[:, order[:dims]] * np.sqrt(
+        np.maximum(eigenvalues[:dims], 0))
+    coords = coords - coords.mean(axis=0)
+    radius = np.sqrt((coords ** 2).sum(axis=1)).max()
+    if radius > 0:
+        coords = coords / radius
+    return coords, eigenvalues
+
+
+def start_rollcalls(coords, rows, cols, yea, m):
+    '''Start each roll call's outcomes at the mean coordinates of the
+    legislators on each side.
+    '''
+    def side_means(side):
+        counts = np.bincount(cols[side], minlength=m)[:, np.newaxis]
+        totals = _group_sums(cols[side], coords[rows[side]], m)
+        return totals / np.maximum(counts, 1)
+
+    yea_means, nay_means = side_means(yea), side_means(~yea)
+    midpoints = np.clip(
+        (yea_means + nay_means) / 2, -MIDPOINT_BOUND, MIDPOINT_BOUND)
+    spreads = np.clip(
+        (nay_means - yea_means) / 2, -SPREAD_BOUND, SPREAD_BOUND)
+    return midpoints, spreads
+
+
+class Model(object):
+    '''The W-NOMINATE likelihood for a fixed set of cast votes.
+    '''
+    def __init__(self, rows, cols, yea, n, m, dims):
+        self.rows = np.asarray(rows)
+        self.cols = np.asarray(cols)
+        self.sign = np.where(yea, 1.0, -1.0)
+        self.n, self.m, self.dims = n, m, dims
+
+    def utilities(self, coords, midpoints, spreads, weights, votes=None):
+        '''Return the distances to the yea and nay outcomes and the
+        (unscaled) utilities of each for every cast vote, or for the cast
+        votes indexed by ``votes``.
+        '''
+        rows, cols = self.rows, self.cols
+        if votes is not None:
+            rows, cols = rows[votes], cols[votes]
+        offset = coords[rows] - midpoints[cols]
+        to_yea = offset + spreads[cols]
+        to_nay = offset - spreads[cols]
+        squared_weights = weights ** 2
+        yea_utility = np.exp(-0.5 * (squared_weights * to_yea ** 2).sum(1))
+        nay_utility = np.exp(-0.5 * (squared_weights * to_nay ** 2).sum(1))
+        return to_yea, to_nay, yea_utility, nay_utility
+
+    def vote_log_likelihoods(self, coords, midpoints, spreads, beta, weights,
+                             votes=None):
+        _, _, yea_utility, nay_utility = self.utilities(
+            coords, midpoints, spreads, weights, votes)
+        sign = self.sign if votes is None else self.sign[votes]
+        return log_ndtr(sign * beta * (yea_utility - nay_utility))
+
+    def scores(self, coords, midpoints, spreads, beta, weights, votes=None):
+        '''Return, for every cast vote (or those indexed by ``votes``), its
+        log-likelihood, the derivative and the Fisher information of that
+        with respect to the vote's utility difference u, and the
+        derivatives of u with respect to the roll call's midpoint and
+        spread. The derivative of u with respect to the legislator's
+        coordinates is minus that for the midpoint.
+        '''
+        to_yea, to_nay, yea_utility, nay_utility = self.utilities(
+            coords, midpoints, spreads, weights, votes)
+        sign = self.sign if votes is None else self.sign[votes]
+        t = sign * beta * (yea_utility - nay_utility)
+        log_cdf = log_ndtr(t)
+        log_pdf = -0.5 * t * t - _LOG_SQRT_2PI
+        mills = np.exp(log_pdf - log_cdf)
+        dll = sign * mills
+        information = mills * np.exp(log_pdf - log_ndtr(-t))
+
+        squared_weights = weights ** 2
+        yea_term = (beta * yea_utility)[:, np.newaxis] * to_yea
+        nay_term = (beta * nay_utility)[:, np.newaxis] * to_nay
+        du_midpoint = squared_weights * (yea_term - nay_term)
+        du_spread = -squared_weights * (yea_term + nay_term)
+        return log_cdf, dll, information, du_midpoint, du_spread
+
+    def beta_weights(self, coords, midpoints, spreads, beta, weights):
+        '''Return the log-likelihood and its gradient with respect to beta
+        and the weights.
+        '''
+        to_yea, to_nay, yea_utility, nay_utility = self.utilities(
+            coords, midpoints, spreads, weights)
+        t = self.sign * beta * (yea_utility - nay_utility)
+        log_cdf = log_ndtr(t)
+        dll = self.sign * np.exp(-0.5 * t * t - _LOG_SQRT_2PI - log_cdf)
+        yea_term = (dll * beta * yea_utility)[:, np.newaxis] * to_yea
+        nay_term = (dll * beta * nay_utility)[:, np.newaxis] * to_nay
+        return log_cdf.sum(), (
+            (dll * (yea_utility - nay_utility)).sum(),
+            -weights * (yea_term * to_yea - nay_term * to_nay).sum(axis=0))
+
+
+def _scoring_steps(groups, size, jacobian, dll, information):
+    '''Solve for a Fisher scoring step in every group's parameters at once.
+    The information matrices are accumulated with bincount and solved as
+    one stack of small systems.
+    '''
+    k = jacobian.shape[1]
+    hessian = np.empty((size, k, k))
+    for a in range(k):
+        for b in range(a, k):
+            hessian[:, a, b] = hessian[:, b, a] = np.bincount(
+                groups, information * jacobian[:, a] * jacobian[:, b],
+                minlength=size)
+    gradient = _group_sums(groups, dll[:, np.newaxis] * jacobian, size)
+    hessian += _RIDGE * np.eye(k)
+    return np.linalg.solve(hessian, gradient[:, :, np.newaxis])[:, :, 0]
+
+
+def _ascend(groups, size, params, step, constrain, log_likelihoods,
+            tolerance, max_steps=_MAX_STEPS):
+    '''Take Fisher scoring steps on each group's parameters until no group
+    improves its log-likelihood by more than ``tolerance``. ``step`` maps
+    the parameters and an index of cast votes to the scoring directions of
+    those votes' groups (zero for the other groups); a group whose step
+    lowers its log-likelihood has the step halved. ``log_likelihoods``
+    maps the parameters and an index of cast votes to those votes'
+    log-likelihoods, so that only the votes of the groups still being
+    stepped or halved are evaluated again.
+
+    The groups' log-likelihoods don't depend on each other's parameters,
+    so a group that no halving of its step improves would take the same
+    step again next time; it is left where it is for the rest of the
+    call.
+    '''
+    votes = np.arange(len(groups))
+    current = np.bincount(
+        groups, log_likelihoods(params, votes), minlength=size)
+    direction = step(params, votes)
+    active = np.ones(size, dtype=bool)
+    for _ in range(max_steps):
+        scale = np.ones(size)
+        candidate, updated = np.copy(params), np.copy(current)
+        worse = np.copy(active)
+        for _ in range(_MAX_HALVINGS):
+            candidate[worse] = constrain(
+                params[worse] + scale[worse, np.newaxis] * direction[worse])
+            votes = np.flatnonzero(worse[groups])
+            updated[worse] = np.bincount(
+                groups[votes], log_likelihoods(candidate, votes),
+                minlength=size)[worse]
+            worse &= updated < current
+            if not worse.any():
+                break
+            scale[worse] /= 2
+        # Groups that never improved keep their parameters.
+        candidate[worse] = params[worse]
+        updated[worse] = current[worse]
+        active &= ~worse
+        gain = updated - current
+        params, current = candidate, updated
+        if gain.max() < tolerance:
+            break
+        direction = step(params, np.flatnonzero(active[groups]))
+    return params
+
+
+def _within_sphere(coords):
+    radius = np.sqrt((coords ** 2).sum(axis=1))[:, np.newaxis]
+    return coords / np.maximum(radius, 1)
+
+
+def _fit_rollcalls(model, coords, midpoints, spreads, beta, weights,
+                   tolerance):
+    dims = coords.shape[1]
+
+    def step(params, votes):
+        _, dll, information, du_midpoint, du_spread = model.scores(
+            coords, params[:, :dims], params[:, dims:], beta, weights, votes)
+        return _scoring_steps(
+            model.cols[votes], model.m, np.hstack([du_midpoint, du_spread]),
+            dll, information)
+
+    def log_likelihoods(params, votes):
+        return model.vote_log_likelihoods(
+            coords, params[:, :dims], params[:, dims:], beta, weights, votes)
+
+    def constrain(params):
+        return np.hstack([
+            np.clip(params[:, :dims], -MIDPOINT_BOUND, MIDPOINT_BOUND),
+            np.clip(params[:, dims:], -SPREAD_BOUND, SPREAD_BOUND)])
+
+    params = _ascend(
+        model.cols, model.m, np.hstack([midpoints, spreads]), step,
+        constrain, log_likelihoods, tolerance)
+    return params[:, :dims], params[:, dims:]
+
+
+def _fit_legislators(model, coords, midpoints, spreads, beta, weights,
+                     tolerance):
+    def step(params, votes):
+        _, dll, information, du_midpoint, _ = model.scores(
+            params, midpoints, spreads, beta, weights, votes)
+        return _scoring_steps(
+            model.rows[votes], model.n, -du_midpoint, dll, information)
+
+    def log_likelihoods(params, votes):
+        return model.vote_log_likelihoods(
+            params, midpoints, spreads, beta, weights, votes)
+
+    return _ascend(model.rows, model.n, coords, step, _within_sphere,
+                   log_likelihoods, tolerance)
+
+
+def _fit_beta_weights(model, coords, midpoints, spreads, beta, weights):
+    '''Fit beta and every weight but the first, which stays fixed.
+    '''
+    def objective(params):
+        ll, (dbeta, dweights) = model.beta_weights(
+            coords, midpoints, spreads, params[0],
+            np.r_[weights[0], params[1:]])
+        return -ll, -np.r_[dbeta, dweights[1:]]
+
+    bounds = [BETA_BOUNDS] + [WEIGHT_BOUNDS] * (len(weights) - 1)
+    params = minimize(
+        objective, np.r_[beta, weights[1:]], jac=True, method='L-BFGS-B',
+        bounds=bounds).x
+    return params[0], np.r_[weights[0], params[1:]]
+
+
+def _fit_stage(model, coords, midpoints, spreads, beta, weights,
+               max_iterations, tolerance):
+    '''Alternate between the roll calls, beta and the weights, and the
+    legislators until the log-likelihood stops improving.
+    '''
+    votes = float(len(model.rows))
+    log_likelihood = None
+    for iteration in range(max_iterations):
+        midpoints, spreads = _fit_rollcalls(
+            model, coords, midpoints, spreads, beta, weights, tolerance)
+        beta, weights = _fit_beta_weights(
+            model, coords, midpoints, spreads, beta, weights)
+        coords = _fit_legislators(
+            model, coords, midpoints, spreads, beta, weights, tolerance)
+
+        previous, log_likelihood = log_likelihood, model.vote_log_likelihoods(
+            coords, midpoints, spreads, beta, weights).sum()
+        if previous is not None and (
+                log_likelihood - previous < tolerance * votes):
+            break
+
+    return dict(
+        coords=coords, midpoints=midpoints, spreads=spreads, beta=beta,
+        weights=weights, log_likelihood=log_likelihood)
+
+
+def _fit_fresh_rollcalls(model, fresh, coords, midpoints, spreads, beta,
+                         weights, tolerance):
+    '''Start the ``fresh`` roll calls from their voters' positions and fit
+    them alone, holding everything else fixed.
+    '''
+    selected = fresh[model.cols]
+    index = np.cumsum(fresh) - 1
+    rows, cols = model.rows[selected], index[model.cols[selected]]
+    yea = model.sign[selected] > 0
+    subset = Model(rows, cols, yea, model.n, fresh.sum(), model.dims)
+
+    midpoints, spreads = np.copy(midpoints), np.copy(spreads)
+    start = start_rollcalls(coords, rows, cols, yea, subset.m)
+    midpoints[fresh], spreads[fresh] = _fit_rollcalls(
+        subset, coords, start[0], start[1], beta, weights, tolerance)
+    return midpoints, spreads
+
+
+def _warm_start(start, initial):
+    '''Copy a previous fit to start from, filling in the coordinates of
+    new legislators from the eigenvector solution (reflected to match).
+    '''
+    start = dict(
+        coords=np.array(start['coords'], dtype=float),
+        midpoints=np.array(start['midpoints'], dtype=float),
+        spreads=np.array(start['spreads'], dtype=float),
+        beta=float(start['beta']),
+        weights=np.array(start['weights'], dtype=float))
+    coords = start['coords']
+    new = np.isnan(coords).any(axis=1)
+    if new.any():
+        dims = coords.shape[1]
+        signs = np.where(
+            (coords[~new] * initial[~new, :dims]).sum(axis=0) < 0, -1, 1)
+        coords[new] = initial[new, :dims] * signs
+    return start
+
+
+def _reflect(fit, polarity):
+    '''Reflect the dimensions so the polarity legislators come out
+    positive.
+    '''
+    for dim, legislator in enumerate(polarity[:fit['coords'].shape[1]]):
+        if fit['coords'][legislator, dim] < 0:
+            for key in ('coords', 'midpoints', 'spreads'):
+                fit[key][:, dim] *= -1
+    return fit
+
+
+def wnominate(rows, cols, yea, n, m, dims=2, polarity=None, ubeta=15,
+              uweights=0.5, max_iterations=20, tolerance=1e-4, start=None):
+    '''Fit W-NOMINATE to the cast votes and return a dict of arrays with
+    the legislator ``coords``, the roll call ``midpoints`` and
+    ``spreads``, ``beta``, ``weights``, ``eigenvalues`` and the final
+    ``log_likelihood``.
+
+    Like W-NOMINATE, the dimensions are fit one at a time, each stage
+    starting from the last one's estimates; ``stages`` holds the fit
+    with the first 1, ..., ``dims`` dimensions. ``polarity`` holds, for
+    each dimension, the index of a legislator who should get a positive
+    coordinate on it. Each stage stops when an iteration raises the
+    log-likelihood by less than ``tolerance`` per vote.
+
+    ``start`` may hold a previous fit to start each stage from: a list
+    of dicts with ``coords``, ``midpoints``, ``spreads``, ``beta`` and
+    ``weights`` for 1, ..., ``dims`` dimensions, where NaN rows mark new
+    legislators and new (or changed) roll calls. New legislators start
+    from the eigenvector solution; new roll calls are fit alone against
+    the previous estimates before everything is refined together.
+    '''
+    rows, cols = np.asarray(rows), np.asarray(cols)
+    yea = np.asarray(yea, dtype=bool)
+    model = Model(rows, cols, yea, n, m, dims)
+
+    initial, eigenvalues = start_coordinates(rows, cols, yea, n, m, dims)
+    coords = np.empty((n, 0))
+    midpoints, spreads = np.empty((m, 0)), np.empty((m, 0))
+    beta, weights = float(ubeta), np.empty(0)
+
+    stages = []
+    for dim in range(dims):
+        if start is None:
+            coords = _within_sphere(
+                np.hstack([coords, initial[:, dim:dim + 1]]))
+            new_midpoints, new_spreads = start_rollcalls(
+                initial[:, dim:dim + 1], rows, cols, yea, m)
+            midpoints = np.hstack([midpoints, new_midpoints])
+            spreads = np.hstack([spreads, new_spreads])
+            weights = np.r_[weights, float(uweights)]
+        else:
+            stage = _warm_start(start[dim], initial)
+            coords = _within_sphere(stage['coords'])
+            midpoints, spreads = stage['midpoints'], stage['spreads']
+            beta, weights = stage['beta'], stage['weights']
+            fresh = np.isnan(midpoints).any(axis=1) | np.isnan(
+                spreads).any(axis=1)
+            if fresh.any():
+                midpoints, spreads = _fit_fresh_rollcalls(
+                    model, fresh, coords, midpoints, spreads, beta, weights,
+                    tolerance)
+
+        fit = _fit_stage(model, coords, midpoints, spreads, beta, weights,
+                         max_iterations, tolerance)
+        coords, midpoints, spreads = (
+            fit['coords'], fit['midpoints'], fit['spreads'])
+        beta, weights = fit['beta'], fit['weights']
+        stages.append(fit)
+
+    if polarity is not None:
+        stages = [
+            _reflect(dict((key, np.copy(value)) for key, value in
+                          stage.iteritems()), polarity)
+            for stage in stages]
+    fit = dict(stages[-1])
+    fit.update(eigenvalues=eigenvalues, stages=stages)
+    return fit
+
+
+def fit_statistics(model, fit):
+    '''Classify every cast vote with the fit. Returns the per-vote
+    log-likelihoods and whether each vote was predicted to be a yea.
+    '''
+    _, _, yea_utility, nay_utility = model.utilities(
+        fit['coords'], fit['midpoints'], fit['spreads'], fit['weights'])
+    utility = fit['beta'] * (yea_utility - nay_utility)
+    return log_ndtr(model.sign * utility), utility > 0
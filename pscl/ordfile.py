@@ -1,8 +1,13 @@
 '''Parse voteview.com .ord files.
 '''
+import os
+import mmap as _mmap
 from StringIO import StringIO
+from itertools import islice
 from collections import namedtuple
 
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from pandas import DataFrame
 
 
@@ -30,20 +35,159 @@ VoterData = namedtuple('VoterData', (
     ))
 
 
+# The fixed-width legislator fields that precede the votes on each line.
+FIELD_WIDTHS = (
+    ('congress_number', 3),
+    ('icpsr_id', 5),
+    ('state_code', 2),
+    ('cong_district', 2),
+    ('state_name', 8),
+    ('party_code', 3),
+    ('occupancy', 1),
+    ('attained_office', 1),
+    ('name', 11),
+    )
+VOTES_OFFSET = sum(width for _, width in FIELD_WIDTHS)
+
+NEWLINE = ord('\n')
+CARRIAGE_RETURN = ord('\r')
+
+# How the voteview codes are grouped when handed to pscl's rollcall
+# function (see Rollcall.from_ordfile).
+ORD_CODES = dict(
+    yea=(1, 2, 3),
+    nay=(4, 5, 6),
+    missing=(7, 8, 9),
+    not_in_legis=(0,))
+
+# The single code each group collapses to when recoding.
+RECODED = dict(yea=1, nay=6, missing=9, not_in_legis=0)
+
+
+def _vote_lookup(dtype=np.uint8, recode=False):
+    '''Return a 256-entry table mapping ascii bytes to the vote codes they
+    represent, so that a whole matrix of bytes can be decoded with one
+    fancy-indexing operation. Anything that isn't a digit (e.g., trailing
+    whitespace) is read as 0. If ``recode`` is true, each group of
+    ORD_CODES is collapsed to its RECODED value.
+    '''
+    lookup = np.zeros(256, dtype=dtype)
+    if recode:
+        for group, codes in ORD_CODES.items():
+            for code in codes:
+                lookup[ord(str(code))] = RECODED[group]
+    else:
+        lookup[ord('0'):ord('9') + 1] = np.arange(10)
+    return lookup
+
+
+def _line_matrix(buf):
+    '''Return the lines of ``buf`` as a 2-D uint8 array with one row per
+    line, minus the line terminators. Empty lines are skipped. If the
+    lines are all the same width (as they are in voteview's files), the
+    result is a view on ``buf``; otherwise short lines are padded with
+    spaces, which read as 0 (not in legislature).
+    '''
+    data = np.frombuffer(buf, dtype=np.uint8)
+    if not len(data):
+        return data.reshape(0, VOTES_OFFSET)
+
+    # A last line without a newline ends at the end of the buffer. It's
+    # handled by the arithmetic below rather than by appending a newline,
+    # which would copy the whole buffer.
+    ends = np.flatnonzero(data == NEWLINE)
+    unterminated = data[-1] != NEWLINE
+    if unterminated:
+        ends = np.r_[ends, len(data)]
+    starts = np.r_[0, ends[:-1] + 1]
+    widths = ends - starts
+    carriage_return = (widths > 0) & (data[ends - 1] == CARRIAGE_RETURN)
+    nonempty = widths - carriage_return > 0
+    count = nonempty.sum()
+    if not count:
+        return np.zeros((0, VOTES_OFFSET), dtype=np.uint8)
+
+    # Same-width lines, perhaps followed by empty ones: step over the
+    # newlines with strides, which doesn't need the last one.
+    if nonempty[:count].all() and (widths[:count] == widths[0]).all():
+        lines = as_strided(data, shape=(count, widths[0]),
+                           strides=(widths[0] + 1, 1))
+        if lines.shape[1] and (lines[:, -1] == CARRIAGE_RETURN).all():
+            lines = lines[:, :-1]
+        return lines
+
+    # Ragged lines: scatter every byte into a space-padded matrix.
+    sizes = widths + 1
+    sizes[-1] -= unterminated
+    keep = (data != NEWLINE) & (data != CARRIAGE_RETURN)
+    line = np.repeat(np.arange(len(ends)), sizes)
+    row = (np.cumsum(nonempty) - 1)[line][keep]
+    col = (np.arange(len(data)) - np.repeat(starts, sizes))[keep]
+    lines = np.full((count, col.max() + 1), ord(' '), dtype=np.uint8)
+    lines[row, col] = data[keep]
+    return lines
+
+
+def _parse_lines(lines, lookup):
+    '''Slice the fixed-width columns out of a 2-D array of lines. Returns
+    a DataFrame of legislator fields and a matrix of vote codes decoded
+    through ``lookup``.
+    '''
+    columns = {}
+    start = 0
+    for field, width in FIELD_WIDTHS:
+        column = np.ascontiguousarray(lines[:, start:start + width])
+        column = column.view('S%d' % width).ravel()
+        columns[field] = np.char.strip(column).astype(str)
+        start += width
+
+    fields = [field for field, _ in FIELD_WIDTHS]
+    legislators = DataFrame(columns, columns=fields)
+    votes = lookup[lines[:, VOTES_OFFSET:]]
+    return legislators, votes
+
+
 class OrdFile(object):
     '''Parse the contents of a voteview.com congressional vote .ord file
     into a stream of namedtuples. The files are fixed-width ascii.
     '''
     def __init__(self, fp):
         self.fp = fp
+        self._buffer = None
+
+    @classmethod
+    def from_path(cls, path, mmap=True):
+        '''Open the ord file at ``path``. If ``mmap`` is true, the file is
+        memory-mapped, and the vote matrix is read straight out of the
+        mapped pages instead of being copied into memory first.
+        '''
+        ordfile = cls(open(path, 'rb'))
+        if mmap and os.path.getsize(path):
+            ordfile._buffer = _mmap.mmap(
+                ordfile.fp.fileno(), 0, access=_mmap.ACCESS_READ)
+        return ordfile
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def __iter__(self):
         self.fp.seek(0)
-        while True:
-            yield next(self)
+        for line in self.fp:
+            yield self._parse_line(line)
 
     def next(self):
-        line = next(self.fp)
+        return self._parse_line(next(self.fp))
+
+    def _parse_line(self, line):
         bf = StringIO(line)
         data = VoterData(
             congress_number=bf.read(3).strip(),
@@ -58,20 +202,88 @@ class OrdFile(object):
             votes=map(float, list(bf.read().strip())))
         return data
 
-    def as_dataframe(self):
+    def iter_chunks(self, rows=1000, dtype=np.uint8, recode=False):
+        '''Parse the file ``rows`` legislators at a time, yielding the same
+        (legislators, votes) pairs as ``as_arrays``, so that memory use is
+        bounded by the chunk size rather than the file size. The index of
+        each legislators DataFrame holds the absolute line numbers.
+        '''
+        lookup = _vote_lookup(dtype, recode)
+        if self._buffer is not None:
+            blocks = self._mapped_blocks(rows)
+        else:
+            blocks = self._read_blocks(rows)
+
+        start = 0
+        for lines in blocks:
+            if not len(lines):
+                continue
+            legislators, votes = _parse_lines(lines, lookup)
+            legislators.index = np.arange(start, start + len(legislators))
+            start += len(legislators)
+            yield legislators, votes
+
+    def _mapped_blocks(self, rows):
+        # Find the end of each block with the map's own find, so only one
+        # block's bytes and lines are in memory at a time.
+        buffer = self._buffer
+        size = len(buffer)
+        start = 0
+        while start < size:
+            end = start
+            for _ in range(rows):
+                end = buffer.find(b'\n', end) + 1
+                if not end:
+                    end = size
+                    break
+            yield _line_matrix(buffer[start:end])
+            start = end
+
+    def _read_blocks(self, rows):
+        self.fp.seek(0)
+        while True:
+            block = list(islice(self.fp, rows))
+            if not block:
+                return
+            buf = block[0][:0].join(block)
+            if not isinstance(buf, bytes):
+                buf = buf.encode('ascii')
+            yield _line_matrix(buf)
+
+    def read(self):
+        '''Return the raw contents of the file as bytes, or the memory map
+        if the file was opened with ``from_path(path, mmap=True)``.
+        '''
+        if self._buffer is not None:
+            return self._buffer
+        self.fp.seek(0)
+        buf = self.fp.read()
+        if not isinstance(buf, bytes):
+            buf = buf.encode('ascii')
+        return buf
+
+    @property
+    def vote_bytes(self):
+        '''The ascii vote columns as a (legislators x votes) uint8 array.
+        For memory-mapped files this is a strided view on the mapped
+        bytes, not a copy.
+        '''
+        return _line_matrix(self.read())[:, VOTES_OFFSET:]
+
+    def as_arrays(self, dtype=np.uint8, recode=False):
+        '''Parse the whole file in one pass. Returns a DataFrame with the
+        VoterData fields of each legislator and a (legislators x votes)
+        matrix of the vote codes. If ``recode`` is true, the codes are
+        collapsed to one value per group of ORD_CODES.
+        '''
+        lookup = _vote_lookup(dtype, recode)
+        return _parse_lines(_line_matrix(self.read()), lookup)
+
+    def as_dataframe(self, dtype=np.int8, recode=False):
         '''Convert the ord file into a pandas.Dataframe in the form expected
-        by the pscl rollcall function.
+        by the pscl rollcall function. The votes are stored as a single
+        (legislators x votes) block of ``dtype``; pass ``np.float64`` for
+        the old float matrix.
         '''
-        # Convert the ord file into a mapping of vote_ids to lists of
-        # vote values, where list index position corresponds to voter_id.
-        votes = []
-        names = []
-        for vote in self:
-            votes.append(vote.votes)
-            names.append(vote.name)
-        votes_dict = dict(enumerate(zip(*votes)))
-
-        # Convert the mapping into a pandas DataFrame.
-        dataframe = DataFrame(votes_dict, index=names)
-
-        return dataframe
+        legislators, votes = self.as_arrays(dtype, recode)
+        return DataFrame(votes, index=list(legislators['name']), copy=False)
@@ -0,0 +1,184 @@
+'''A pool of long-lived worker processes that start R and load the pscl
+and wnominate packages once, then serve requests over pipes for as long
+as the pool is open. That way a short-lived caller doesn't pay for
+starting R itself:
+
+    with RPool(workers=4) as pool:
+        result = pool.wnominate(rollcall, polarity=(1, 2))
+
+The pool can be shared between threads; each request holds one worker
+until it's answered. Vote matrices (or the arrays of sparse ones) are
+sent to the workers as raw byte buffers rather than pickled, and results
+come back as python copies of the R objects, wrapped in the usual
+classes.
+'''
+import traceback
+from multiprocessing import Pipe, Process, cpu_count
+from Queue import Queue
+
+import numpy as np
+from scipy import sparse
+
+
+_READY = 'ready'
+
+
+def _request(method, rollcall, args, kwargs):
+    '''Split a request into a picklable header (Rollcall.portable without
+    the votes) and the vote buffers: the matrix, or the data, indices
+    and indptr of a sparse one.
+    '''
+    portable = rollcall.portable()
+    votes = portable.pop('votes')
+    if sparse.issparse(votes):
+        arrays = [votes.data, votes.indices, votes.indptr]
+    else:
+        arrays = [votes]
+    arrays = [np.ascontiguousarray(array) for array in arrays]
+    header = dict(
+        method=method, args=args, kwargs=kwargs, rollcall=portable,
+        sparse=sparse.issparse(votes), shape=votes.shape,
+        dtypes=[array.dtype.str for array in arrays])
+    return header, arrays
+
+
+def _handle(header, buffers):
+    from .rollcall import Rollcall
+    from .ideal import ideal
+    from .wnominate import wnominate
+    from .convert import to_python
+
+    arrays = [np.frombuffer(buffer, dtype=dtype)
+              for buffer, dtype in zip(buffers, header['dtypes'])]
+    if header['sparse']:
+        votes = sparse.csr_matrix(tuple(arrays), shape=header['shape'])
+    else:
+        votes = arrays[0].reshape(header['shape'])
+    kwargs = header['kwargs']
+    rollcall = Rollcall.from_portable(
+        dict(header['rollcall'], votes=votes), kwargs.get('engine', 'r'))
+
+    methods = dict(
+        ideal=ideal, wnominate=wnominate,
+        summary=lambda rollcall, **kwargs: rollcall.summary(**kwargs),
+        drop_unanimous=Rollcall.drop_unanimous)
+    result = methods[header['method']](rollcall, *header['args'], **kwargs)
+    return type(result), to_python(result.obj)
+
+
+def _serve(connection):
+    '''The worker loop: load R, then answer requests until told to stop.
+    '''
+    from .utils import R
+    R.load()
+    connection.send(_READY)
+    while True:
+        header = connection.recv()
+        if header is None:
+            break
+        buffers = [connection.recv_bytes() for _ in header['dtypes']]
+        try:
+            connection.send((_handle(header, buffers), None))
+        except Exception:
+            connection.send((None, traceback.format_exc()))
+    connection.close()
+
+
+class RPoolError(Exception):
+    '''A request failed in a worker. The message holds its traceback.
+    '''
+
+
+class RPool(object):
+    '''A pool of ``workers`` R processes, one per CPU by default. A worker
+    that dies is replaced with a new one.
+    '''
+    def __init__(self, workers=None):
+        self._workers = cpu_count() if workers is None else workers
+        self._idle = Queue()
+        started = [self._start() for _ in range(self._workers)]
+
+        # Wait for every worker to finish loading R.
+        for process, connection in started:
+            connection.recv()
+            self._idle.put((process, connection))
+
+    def _start(self):
+        connection, child = Pipe()
+        process = Process(target=_serve, args=(child,))
+        process.daemon = True
+        process.start()
+        # Only the worker holds the other end, so its pipe reports EOF if
+        # it dies.
+        child.close()
+        return process, connection
+
+    def _replace(self, worker):
+        '''Stop a worker and start a ready one in its place.'''
+        process, connection = worker
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        connection.close()
+        process, connection = self._start()
+        connection.recv()
+        return process, connection
+
+    def apply(self, method, rollcall, *args, **kwargs):
+        '''Run ``method`` ('wnominate', 'ideal', 'summary' or
+        'drop_unanimous') on the rollcall in a worker and return the
+        result.
+        '''
+        header, arrays = _request(method, rollcall, args, kwargs)
+        worker = self._idle.get()
+        if not worker[0].is_alive():
+            worker = self._replace(worker)
+        connection = worker[1]
+        try:
+            connection.send(header)
+            for array in arrays:
+                connection.send_bytes(array)
+            result, error = connection.recv()
+        except (EOFError, IOError):
+            self._idle.put(self._replace(worker))
+            raise RPoolError('The worker died during the request.')
+        except BaseException:
+            self._idle.put(worker)
+            raise
+        self._idle.put(worker)
+        if error is not None:
+            raise RPoolError(error)
+        wrapper, obj = result
+        return wrapper(obj)
+
+    def wnominate(self, rollcall, polarity, **kwargs):
+        return self.apply('wnominate', rollcall, polarity, **kwargs)
+
+    def ideal(self, rollcall, **kwargs):
+        return self.apply('ideal', rollcall, **kwargs)
+
+    def summary(self, rollcall, **kwargs):
+        return self.apply('summary', rollcall, **kwargs)
+
+    def drop_unanimous(self, rollcall, lop=0):
+        return self.apply('drop_unanimous', rollcall, lop=lop)
+
+    def close(self):
+        '''Stop the workers once they've finished their requests.
+        '''
+        for _ in range(self._workers):
+            process, connection = self._idle.get()
+            try:
+                connection.send(None)
+            except IOError:
+                # It has already died.
+                pass
+            process.join()
+            connection.close()
+        self._workers = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
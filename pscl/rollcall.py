@@ -1,15 +1,21 @@
-import numpy as np
-from pandas.rpy import common as rpy_common
+import os
+import json
 
-from rpy2.robjects.packages import importr
+import numpy as np
+from pandas import DataFrame, Index
+from scipy import sparse
 
-from .base import Field, Translator, Wrapper
-from .accessors import ValueAccessor, VectorAccessor
+from .base import Field, RFunction, Translator, Wrapper
+from .convert import to_r_data_frame, to_r_matrix, to_python
+from .accessors import ValueAccessor, VectorAccessor, LabeledArrayAccessor
 from .ordfile import OrdFile
 from .wnominate import wnominate
 from .ideal import ideal
+from .utils import R
+
 
-pscl = importr('pscl')
+# The int8 value that Rollcall.save stores NaN votes as.
+_NAN_VOTE = -128
 
 
 class NumberOfLegislators(VectorAccessor):
@@ -39,15 +45,34 @@ class Votes(VectorAccessor):
     '''
 
 
+class VoteMatrix(LabeledArrayAccessor):
+    '''The votes as a DataFrame labeled with the legislator and roll call
+    names. A sparse vote store is expanded, with zeros in the implicit
+    cells.
+    '''
+    key = 'votes'
+
+    def get_value(self, inst):
+        votes = inst[self.key]
+        if not sparse.issparse(votes):
+            return LabeledArrayAccessor.get_value(self, inst)
+        return DataFrame(
+            votes.toarray(), index=inst.legis_names,
+            columns=inst.vote_names, copy=False)
+
+
 class Source(VectorAccessor):
     '''A fake, hard-coded C: filesystem location of the ord file. Useless.
     '''
 
+
 class RollcallSummary(Wrapper):
 
     all_votes = AllVotes()
     n = NumberOfLegislators()
     m = NumberOfRollcalls()
+    legislator_tallies = LabeledArrayAccessor('legisTab')
+    vote_tallies = LabeledArrayAccessor('voteTab')
     eq_attrs = ('m', 'n', 'codes', 'all_votes')
 
     @property
@@ -67,16 +92,42 @@ class Rollcall(Wrapper):
     '''
     # Wrapped R functions ---------------------------------------------------
     def drop_unanimous(self, lop=0):
-        self.obj = pscl.dropUnanimous(self.obj, lop=0)
+        '''Drop the roll calls with ``lop`` or fewer legislators in the
+        minority, as pscl's dropUnanimous does. The filtering is done in
+        python, with filter, so an R rollcall is replaced by one built in
+        python; it's sent back to R when r_obj is next needed.
+        '''
+        self.obj = self.filter(lop=lop)[0].obj
         return self
 
-    def summary(self):
-        return RollcallSummary(pscl.summary_rollcall(self.obj))
+    def summary(self, engine=None):
+        '''Summarize the rollcall, as pscl's summary.rollcall does. By
+        default rollcalls built in python are summarized without R, and
+        R rollcalls in R; pass engine='r' or 'numpy' to choose.
+        '''
+        if engine is None:
+            engine = 'r' if hasattr(self.obj, 'rx2') else 'numpy'
+        if engine == 'numpy':
+            return RollcallSummary(_native_summary(self))
+        return RollcallSummary(R.pscl.summary_rollcall(self.r_obj))
+
+    @property
+    def r_obj(self):
+        '''The R rollcall object. Rollcalls built with engine='numpy' are
+        sent to R the first time one is needed.
+        '''
+        if hasattr(self.obj, 'rx2'):
+            return self.obj
+        cache = self._accessor_cache
+        if 'r_obj' not in cache:
+            cache['r_obj'] = _r_rollcall(self)
+        return cache['r_obj']
 
     # Accessors ---------------------------------------------------------------
     n = NumberOfLegislators()
     m = NumberOfRollcalls()
     votes = Votes()
+    vote_matrix = VoteMatrix()
     source = Source()
     eq_attrs = ('m', 'n', 'codes', 'all_votes')
 
@@ -91,6 +142,92 @@ class Rollcall(Wrapper):
             items.append((yes_no_other, tuple(value_list)))
         return dict(items)
 
+    @property
+    def is_sparse(self):
+        '''Whether the votes are held in a scipy.sparse matrix, in which
+        the cells that aren't stored are missing or not in legislature.
+        '''
+        return sparse.issparse(self.get('votes'))
+
+    @property
+    def legis_names(self):
+        if self.is_sparse:
+            return self['legis.names']
+        return self.vote_matrix.index
+
+    @property
+    def vote_names(self):
+        if self.is_sparse:
+            return self['vote.names']
+        return self.vote_matrix.columns
+
+    @property
+    def shape(self):
+        '''The number of legislators and roll calls.'''
+        if self.is_sparse:
+            return self['votes'].shape
+        return self.vote_matrix.shape
+
+    def observed_votes(self):
+        '''Return the yeas and nays cast as three parallel arrays: the
+        legislator (row) index, the roll call (column) index, and whether
+        the vote was a yea. This is the form the native engines work on.
+        '''
+        codes = self.codes
+        if self.is_sparse:
+            votes = self['votes'].tocoo()
+            yea = np.in1d(votes.data, codes['yea'])
+            cast = np.flatnonzero(yea | np.in1d(votes.data, codes['nay']))
+            return votes.row[cast], votes.col[cast], yea[cast]
+        votes = self.arrays.votes
+        yea = np.in1d(votes, codes['yea']).reshape(votes.shape)
+        nay = np.in1d(votes, codes['nay']).reshape(votes.shape)
+        rows, cols = np.nonzero(yea | nay)
+        return rows, cols, yea[rows, cols]
+
+    def filter(self, lop=0, minvotes=0, proportion=False):
+        '''Drop the roll calls with ``lop`` or fewer yeas or nays, then the
+        legislators with fewer than ``minvotes`` yeas and nays on the roll
+        calls that are left. If ``proportion`` is true, ``lop`` is instead
+        a proportion of the votes cast on each roll call, as in
+        wnominate, and only the roll calls whose minority is a smaller
+        share than that are dropped.
+
+        Returns the filtered Rollcall, built in python, and the original
+        row of each legislator and column of each roll call in it.
+        '''
+        rows, cols, yea = self.observed_votes()
+        n, m = self.shape
+        keep_legis, keep_votes = _filter_masks(
+            rows, cols, yea, n, m, lop, minvotes, proportion)
+        legis_index = np.flatnonzero(keep_legis)
+        vote_index = np.flatnonzero(keep_votes)
+        return self._subset(legis_index, vote_index), legis_index, vote_index
+
+    def _subset(self, legis_index, vote_index):
+        codes = self.codes
+
+        def rows_of(key, index):
+            frame = to_python(self.get(key))
+            if isinstance(frame, DataFrame):
+                return frame.iloc[index]
+            return None
+
+        if self.is_sparse:
+            subset = self['votes'][legis_index][:, vote_index]
+            names = dict(legis_names=self.legis_names[legis_index],
+                         vote_names=self.vote_names[vote_index])
+        else:
+            subset = self.vote_matrix.iloc[legis_index, vote_index]
+            names = {}
+        return type(self)(_native_rollcall(
+            subset, yea=codes['yea'], nay=codes['nay'],
+            missing=codes['missing'], not_in_legis=codes['notInLegis'],
+            legis_data=rows_of('legis.data', legis_index),
+            vote_data=rows_of('vote.data', vote_index),
+            desc=_scalar(self.get('desc')),
+            source=_scalar(self.get('source')), **names))
+
     # Alternative constructors ------------------------------------------------
     @classmethod
     def from_matrix(cls, r_matrix, **kwargs):
@@ -101,19 +238,37 @@ class Rollcall(Wrapper):
         return _RollcallTranslator(**kwargs).r_object(r_matrix)
 
     @classmethod
-    def from_dataframe(cls, dataframe, **kwargs):
+    def from_dataframe(cls, dataframe, engine='r', **kwargs):
         '''Instantiate a Rollcall object from a pandas.DataFrame corresponding
         to the R matrix described in the pscl docs.
         See http://cran.r-project.org/web/packages/pscl/pscl.pdf
+
+        With engine='numpy', the object is built in python without calling
+        R, which is enough for the native ideal and wnominate engines.
+        ``dataframe`` may then also be a scipy.sparse matrix, with the
+        names passed as legis_names and vote_names.
+
+        Otherwise legis_data and vote_data, if they're DataFrames, are
+        sent to R as data.frames.
         '''
-        r_matrix = rpy_common.convert_to_r_matrix(dataframe)
+        if engine == 'numpy':
+            return cls(_native_rollcall(dataframe, **kwargs))
+        for key in ('legis_data', 'vote_data'):
+            if isinstance(kwargs.get(key), DataFrame):
+                kwargs[key] = to_r_data_frame(kwargs[key])
+        r_matrix = to_r_matrix(dataframe)
         return cls.from_matrix(r_matrix, **kwargs)
 
     @classmethod
     def from_ordfile(cls, fp, **kwargs):
-        '''Instantiate a RollCall object from an ordfile.
+        '''Instantiate a RollCall object from an ordfile. The VoterData
+        fields of each legislator are kept as the legis.data.
         '''
-        dataframe = OrdFile(fp).as_dataframe()
+        legislators, votes = OrdFile(fp).as_arrays(np.int8)
+        names = list(legislators['name'])
+        dataframe = DataFrame(votes, index=names, copy=False)
+        legislators.index = names
+        kwargs.setdefault('legis_data', legislators)
         rollcall = cls.from_dataframe(dataframe,
             yea=[1.0, 2.0, 3.0],
             nay=[4.0, 5.0, 6.0],
@@ -122,6 +277,136 @@ class Rollcall(Wrapper):
             legis_names=tuple(dataframe.index), **kwargs)
         return rollcall
 
+    # Storage -----------------------------------------------------------------
+    def portable(self):
+        '''Return the votes, names and codes as plain numpy and python
+        objects, which pickle cheaply, for rebuilding the rollcall in
+        another process with from_portable. Sparse votes stay sparse.
+        '''
+        codes = self.codes
+        if self.is_sparse:
+            votes = self['votes']
+        else:
+            votes = np.asarray(self.vote_matrix.values)
+        return dict(
+            votes=votes,
+            legis_names=list(self.legis_names),
+            vote_names=list(self.vote_names),
+            codes=dict(
+                yea=list(codes['yea']), nay=list(codes['nay']),
+                missing=list(codes['missing']) or None,
+                not_in_legis=list(codes['notInLegis'])))
+
+    @classmethod
+    def from_portable(cls, portable, engine='r'):
+        '''Rebuild a rollcall from the output of portable(), in R or, with
+        engine='numpy', in python. Sparse votes are only expanded for R.
+        '''
+        votes = portable['votes']
+        kwargs = dict(portable['codes'])
+        if sparse.issparse(votes) and engine == 'numpy':
+            kwargs.update(legis_names=portable['legis_names'],
+                          vote_names=portable['vote_names'])
+        else:
+            if sparse.issparse(votes):
+                votes = votes.toarray()
+            votes = DataFrame(votes, index=portable['legis_names'],
+                              columns=portable['vote_names'], copy=False)
+        return cls.from_dataframe(votes, engine=engine, **kwargs)
+
+    def save(self, path):
+        '''Save the rollcall to the directory ``path``, one .npy file per
+        column: the votes as one int8 matrix, the legislator and roll
+        call names, and each column of the legis.data and vote.data. The
+        codes, description and source go in manifest.json.
+
+        NaN votes (NA in R) are stored as -128, which is then reserved,
+        and the manifest records that they were.
+        '''
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        votes = self.vote_matrix
+        values = np.asarray(votes.values)
+        nan = np.isnan(values) if values.dtype.kind == 'f' else None
+        if nan is not None and nan.any():
+            values = np.where(nan, _NAN_VOTE, values)
+        else:
+            nan = None
+        if values.size and (values.min() < -128 or values.max() > 127 or
+                            (values != np.round(values)).any()):
+            raise ValueError('The votes must be integers that fit in int8.')
+        if nan is not None and (values[~nan] == _NAN_VOTE).any():
+            raise ValueError(
+                'Votes of %d are reserved for NaN votes.' % _NAN_VOTE)
+
+        def save_array(name, array):
+            array = np.asarray(array)
+            if array.dtype.kind == 'O':
+                array = np.array([str(item) for item in array])
+            np.save(os.path.join(path, name + '.npy'), array)
+
+        save_array('votes', values.astype(np.int8))
+        save_array('legislators', list(votes.index))
+        save_array('rollcalls', list(votes.columns))
+
+        manifest = dict(
+            version=1,
+            nan=None if nan is None else _NAN_VOTE,
+            codes=self.codes,
+            desc=_scalar(self.get('desc')),
+            source=_scalar(self.get('source')))
+        for key, prefix in (('legis.data', 'legis'), ('vote.data', 'vote')):
+            frame = to_python(self.get(key))
+            if not isinstance(frame, DataFrame):
+                manifest[key] = None
+                continue
+            manifest[key] = [str(column) for column in frame.columns]
+            for number, column in enumerate(frame.columns):
+                save_array('%s.%d' % (prefix, number), frame[column].values)
+
+        with open(os.path.join(path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        '''Load a rollcall saved with save(). The arrays are memory-mapped
+        unless ``mmap`` is false, so only the parts that are used are
+        read; votes saved with NaNs in them are read into a float matrix
+        instead. The result is built in python, as with engine='numpy'.
+        '''
+        mode = 'r' if mmap else None
+
+        def load_array(name):
+            return np.load(os.path.join(path, name + '.npy'), mmap_mode=mode)
+
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        legislators = list(load_array('legislators'))
+        rollcalls = list(load_array('rollcalls'))
+
+        frames = {}
+        for key, prefix, index in (('legis.data', 'legis', legislators),
+                                   ('vote.data', 'vote', rollcalls)):
+            columns = manifest[key]
+            if columns is not None:
+                frames[key] = DataFrame(dict(
+                    (column, load_array('%s.%d' % (prefix, number)))
+                    for number, column in enumerate(columns)),
+                    index=index, columns=columns)
+
+        votes = load_array('votes')
+        if manifest.get('nan') is not None:
+            votes = np.where(votes == manifest['nan'], np.nan, votes)
+
+        codes = manifest['codes']
+        return cls(_native_rollcall(
+            votes, yea=codes['yea'], nay=codes['nay'],
+            missing=codes['missing'] or None,
+            not_in_legis=codes['notInLegis'], legis_names=legislators,
+            vote_names=rollcalls, legis_data=frames.get('legis.data'),
+            vote_data=frames.get('vote.data'), desc=manifest['desc'],
+            source=manifest['source']))
+
     # Analysis methods -------------------------------------------------------
     def ideal(self, *args, **kwargs):
         '''
@@ -138,7 +423,7 @@ class Rollcall(Wrapper):
 class _RollcallTranslator(Translator):
     '''A python wrapper around the R pscl pacakge's rollcall object.
     '''
-    r_type = pscl.rollcall
+    r_type = RFunction('pscl', 'rollcall')
     wrapper = Rollcall
 
     yea = Field(name='yea', default=1)
@@ -152,3 +437,230 @@ class _RollcallTranslator(Translator):
         ('vote_data', 'vote.data'),
         ('desc', 'desc'),
         ('source', 'source'))
+
+
+def _filter_masks(rows, cols, yea, n, m, lop=0, minvotes=0,
+                  proportion=False):
+    '''Return boolean masks of the legislators and roll calls that pass
+    Rollcall.filter, from the yeas and nays as three parallel arrays.
+    '''
+    yeas = np.bincount(cols[yea], minlength=m)
+    nays = np.bincount(cols[~yea], minlength=m)
+    minority = np.minimum(yeas, nays)
+    if proportion:
+        # Divide rather than scale lop, so that a share of exactly lop
+        # isn't lost to rounding. Roll calls with no votes give NaN.
+        with np.errstate(invalid='ignore'):
+            keep_votes = minority / (yeas + nays).astype(float) >= lop
+    else:
+        keep_votes = minority > lop
+    keep_legis = np.bincount(
+        rows[keep_votes[cols]], minlength=n) >= minvotes
+    return keep_legis, keep_votes
+
+
+# The order of the columns of the per-legislator and per-vote tallies.
+_CATEGORIES = ('yea', 'nay', 'missing', 'notInLegis')
+
+
+def _tabulate(values):
+    '''Return the distinct values in ``values`` and the index of each
+    cell's value among them. Integer matrices are tabulated with an
+    offset instead of a sort. All the NaNs are counted as one value,
+    which comes last.
+    '''
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        nan = np.isnan(values)
+        if nan.any():
+            distinct, index = _tabulate(values[~nan])
+            cells = np.full(values.shape, len(distinct), dtype=np.intp)
+            cells[~nan] = index
+            return np.append(distinct, np.nan), cells
+    if values.dtype.kind == 'f' and values.size and np.isfinite(
+            values).all() and (values == np.round(values)).all():
+        values = values.astype(np.int64)
+    if values.dtype.kind not in 'iub' or not values.size:
+        distinct, index = np.unique(values, return_inverse=True)
+        return distinct, index.reshape(values.shape)
+    # Offset in intp: small integer types would overflow, and boolean
+    # indexes would be taken as masks by the lookup below.
+    values = values.astype(np.intp, copy=False)
+    low = values.min()
+    index = values - low if low else values
+    present = np.flatnonzero(np.bincount(index.ravel()))
+    lookup = np.zeros(present[-1] + 1, dtype=np.intp)
+    lookup[present] = np.arange(len(present))
+    return present + low, lookup[index]
+
+
+def _is_code(value, codes):
+    '''Whether ``value`` is one of ``codes``, where NaN matches NaN (R's
+    NA).
+    '''
+    if isinstance(value, float) and np.isnan(value):
+        return any(isinstance(code, float) and np.isnan(code)
+                   for code in codes)
+    return value in codes
+
+
+def _native_summary(rollcall):
+    '''Build the python stand-in for pscl's summary.rollcall object. The
+    allVotes table counts each distinct vote value, labeled with the code
+    it stands for; legisTab and voteTab tally the yeas, nays, missing and
+    not in legislature votes of each legislator and roll call.
+    '''
+    codes = rollcall.codes
+    n, m = rollcall.shape
+    if rollcall.is_sparse:
+        votes = rollcall['votes']
+        distinct, index = _tabulate(votes.data)
+        # The implicit cells are zeros.
+        implicit = n * m - votes.nnz
+        if implicit and 0 not in distinct:
+            position = np.searchsorted(distinct, 0)
+            distinct = np.insert(distinct, position, 0)
+            index = index + (index >= position)
+        counts = np.bincount(index, minlength=len(distinct))
+        if implicit:
+            counts[np.searchsorted(distinct, 0)] += implicit
+    else:
+        votes = rollcall.vote_matrix.values
+        distinct, index = _tabulate(votes)
+        counts = np.bincount(index.ravel(), minlength=len(distinct))
+
+    names, category = [], np.full(len(distinct), -1, dtype=np.intp)
+    for number, value in enumerate(distinct):
+        name = None
+        for which, key in enumerate(_CATEGORIES):
+            if _is_code(value, codes[key]):
+                name, category[number] = key, which
+                break
+        if distinct.dtype.kind not in 'iufb':
+            label = value
+        else:
+            label = 'NA' if np.isnan(value) else '%g' % value
+        names.append('%s (%s)' % (label, name) if name else str(label))
+    all_votes = DataFrame(
+        dict(Count=counts, Percent=counts / float(counts.sum()) * 100),
+        index=names, columns=['Count', 'Percent'])
+
+    kind = category[index]
+    size = len(_CATEGORIES)
+    if rollcall.is_sparse:
+        # Tally the stored cells, then count the implicit ones under the
+        # category of the zero code.
+        stored = kind >= 0
+        rows = np.repeat(np.arange(n), np.diff(votes.indptr))[stored]
+        cols = votes.indices[stored]
+        legis_tallies = np.bincount(
+            rows * size + kind[stored], minlength=n * size).reshape(n, size)
+        vote_tallies = np.bincount(
+            cols * size + kind[stored], minlength=m * size).reshape(m, size)
+        zero = category[np.searchsorted(distinct, 0)] if implicit else -1
+        if zero >= 0:
+            legis_tallies[:, zero] += m - np.diff(votes.indptr)
+            vote_tallies[:, zero] += n - np.bincount(
+                votes.indices, minlength=m)
+    else:
+        tallies = [kind == which for which in range(size)]
+        legis_tallies = np.column_stack([
+            tally.sum(axis=1) for tally in tallies])
+        vote_tallies = np.column_stack([
+            tally.sum(axis=0) for tally in tallies])
+    legis_tab = DataFrame(
+        legis_tallies, index=rollcall.legis_names, columns=_CATEGORIES)
+    vote_tab = DataFrame(
+        vote_tallies, index=rollcall.vote_names, columns=_CATEGORIES)
+    return {
+        'n': np.array([n]),
+        'm': np.array([m]),
+        'codes': codes,
+        'allVotes': all_votes,
+        'legisTab': legis_tab,
+        'voteTab': vote_tab}
+
+
+def _scalar(value):
+    '''Unwrap a length one R vector (or pass a python value through).
+    '''
+    value = to_python(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()[0] if len(value) else None
+    return value
+
+
+def _codes(value):
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return (value,)
+
+
+def _native_rollcall(dataframe, yea=1, nay=2, missing=None, not_in_legis=9,
+                     legis_names=None, vote_names=None, legis_data=None,
+                     vote_data=None, desc=None, source=None):
+    '''Build a python stand-in for the R rollcall object: a dict with the
+    same elements, holding the votes as a DataFrame. The defaults are the
+    same as _RollcallTranslator's.
+
+    A scipy.sparse matrix of votes is kept as a CSR matrix, with the
+    legislator and roll call names alongside. Its implicit cells are
+    zeros, so zero may not be a yea or nay code.
+    '''
+    codes = dict(
+        yea=_codes(yea), nay=_codes(nay),
+        notInLegis=_codes(not_in_legis), missing=_codes(missing))
+    names = {}
+    if sparse.issparse(dataframe):
+        if 0 in codes['yea'] + codes['nay']:
+            raise ValueError('Zero is implicit in a sparse vote matrix, '
+                             'so it can\'t be a yea or nay code.')
+        votes = sparse.csr_matrix(dataframe)
+        if (votes.data == 0).any():
+            votes = votes.copy()
+            votes.eliminate_zeros()
+        n, m = votes.shape
+        names['legis.names'] = Index(
+            range(n) if legis_names is None else list(legis_names))
+        names['vote.names'] = Index(
+            range(m) if vote_names is None else list(vote_names))
+    else:
+        votes = DataFrame(dataframe, copy=False)
+        if legis_names is not None:
+            votes.index = list(legis_names)
+        if vote_names is not None:
+            votes.columns = list(vote_names)
+        n, m = votes.shape
+    rollcall = {
+        'votes': votes,
+        'codes': codes,
+        'n': np.array([n]),
+        'm': np.array([m]),
+        'legis.data': legis_data,
+        'vote.data': vote_data,
+        'desc': desc,
+        'source': source}
+    rollcall.update(names)
+    return rollcall
+
+
+def _r_rollcall(rollcall):
+    '''Create the R rollcall object for a natively built Rollcall.
+    '''
+    codes = rollcall.codes
+    votes = rollcall.vote_matrix
+    kwargs = dict(
+        yea=list(codes['yea']),
+        nay=list(codes['nay']),
+        not_in_legis=list(codes['notInLegis']),
+        legis_names=tuple(votes.index),
+        vote_names=tuple(votes.columns))
+    if codes['missing']:
+        kwargs['missing'] = list(codes['missing'])
+    for key, field in (('desc', 'desc'), ('source', 'source')):
+        if rollcall.get(key) is not None:
+            kwargs[field] = rollcall[key]
+    translator = _RollcallTranslator(**kwargs)
+    return translator.r_type(to_r_matrix(votes), **translator.r_kwargs())
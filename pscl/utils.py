@@ -25,6 +25,49 @@ class Cached(object):
         return result
 
 
+class _R(object):
+    '''Lazy handles on rpy2 and the R packages pscl wraps. Nothing is
+    imported, and R isn't started, until one of them is first used.
+    '''
+    @Cached
+    def robjects(self):
+        from rpy2 import robjects
+        return robjects
+
+    @Cached
+    def numpy2ri(self):
+        from rpy2.robjects import numpy2ri
+        return numpy2ri
+
+    @Cached
+    def r(self):
+        return self.robjects.r
+
+    @Cached
+    def pscl(self):
+        return self._importr('pscl')
+
+    @Cached
+    def wnominate(self):
+        return self._importr('wnominate')
+
+    def load(self):
+        '''Start R and load pscl and wnominate now rather than on first
+        use, as pool workers do before taking requests. Without rpy2
+        there's nothing to load, and only the numpy engines will work.
+        '''
+        try:
+            self.pscl, self.wnominate
+        except ImportError:
+            pass
+
+    def _importr(self, name):
+        from rpy2.robjects.packages import importr
+        return importr(name)
+
+R = _R()
+
+
 @contextlib.contextmanager
 def cd(path):
     '''Creates the path if it doesn't exist'''
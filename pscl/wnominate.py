@@ -1,11 +1,19 @@
-from rpy2.robjects.packages import importr
-from rpy2.robjects import r as rr
+import warnings
 
-from .base import Translator, Wrapper, SubWrapper
+import numpy as np
+from pandas import DataFrame
+
+from .convert import _r_vector
+from .base import RFunction, Translator, Wrapper, SubWrapper
 from .accessors import ValueAccessor, VectorAccessor
+from .utils import R
 
 
-r_wnominate = importr('wnominate')
+_SET_LEGISLATORS = '''
+    function(x, name, values) {
+        x$legislators[[name]] <- values
+        x
+    }'''
 
 
 # --------------------------------------------------------------------------
@@ -244,7 +252,7 @@ class Wnominate(Wrapper):
         return tuple(self._get_eq_vals()) == tuple(other._get_eq_vals())
 
     def summary(self):
-        return WnominateSummary(r_wnominate.summary_nomObject(self.obj))
+        return WnominateSummary(R.wnominate.summary_nomObject(self.obj))
 
     def plot(self):
         '''Equivalent to:
@@ -254,23 +262,23 @@ class Wnominate(Wrapper):
             rollcall.plot_skree()
             rollcall.plot_cutlines()
         '''
-        return r_wnominate.plot_nomObject(self.obj)
+        return R.wnominate.plot_nomObject(self.obj)
 
     def plot_coords(self):
-        return r_wnominate.plot_coords(self.obj)
+        return R.wnominate.plot_coords(self.obj)
 
     def plot_angles(self):
-        return r_wnominate.plot_angles(self.obj)
+        return R.wnominate.plot_angles(self.obj)
 
     def plot_skree(self):
-        return r_wnominate.plot_skree(self.obj)
+        return R.wnominate.plot_skree(self.obj)
 
     def plot_cutlines(self):
-        return r_wnominate.plot_cutlines(self.obj)
+        return R.wnominate.plot_cutlines(self.obj)
 
 
 class _WnominateTranslator(Translator):
-    r_type = r_wnominate.wnominate
+    r_type = RFunction('wnominate', 'wnominate')
     wrapper = Wnominate
     field_names = (
         ('obj', 'rcObject'),
@@ -284,6 +292,362 @@ class _WnominateTranslator(Translator):
         ('verbose', 'verbose'))
 
 
-def wnominate(rollcall, polarity, **kwargs):
+def wnominate(rollcall, polarity, engine='r', workers=None, start=None,
+              **kwargs):
+    '''Scale the rollcall with W-NOMINATE. With engine='numpy', it's fit by
+    the native estimator in pscl.nominate instead of the R package; see
+    _native_wnominate for the arguments it supports.
+
+    If ``workers`` is given (or with engine='numpy'), the bootstrap
+    trials behind se1D/se2D are run here instead of serially in R: each
+    trial redraws the votes from the fitted probabilities and refits
+    them in a pool of ``workers`` processes. Pass ``seed`` to make the
+    trials reproducible.
+
+    ``start`` may be a previous Wnominate result, e.g. for the same
+    legislature before the latest roll calls came in. Its beta and
+    weights seed ``ubeta`` and ``uweights``; the numpy engine also
+    starts from its legislator coordinates and roll call parameters,
+    matched by name, and only fits new or changed roll calls from
+    scratch.
+    '''
+    if start is not None:
+        kwargs.setdefault('ubeta', start.beta[0])
+        if len(start.weights) > 1:
+            kwargs.setdefault('uweights', start.weights[1])
+    trials = kwargs.get('trials', 3)
+    if trials >= 4 and (workers is not None or engine == 'numpy'):
+        return _bootstrap_wnominate(
+            rollcall, polarity, engine, workers, start, kwargs)
+    kwargs.pop('seed', None)
+    if engine == 'numpy':
+        # As in R, fewer than 4 trials give no standard errors.
+        kwargs.pop('trials', None)
+        return _native_wnominate(rollcall, polarity, start=start, **kwargs)
     return _WnominateTranslator(
-        obj=rollcall.obj, polarity=polarity, **kwargs).r_object()
+        obj=rollcall.r_obj, polarity=polarity, **kwargs).r_object()
+
+
+def _polarity_index(polarity, names):
+    '''Like wnominate, accept legislator names or (1-based) row numbers.
+    '''
+    names = list(names)
+    index = []
+    for legislator in polarity:
+        if isinstance(legislator, basestring):
+            index.append(names.index(legislator))
+        else:
+            index.append(int(legislator) - 1)
+    return index
+
+
+def _tallies(groups, size, yea, predicted, log_likelihoods):
+    '''Count the (in)correctly classified yeas and nays, and the geometric
+    mean probability, of each legislator or roll call.
+    '''
+    def count(mask):
+        return np.bincount(groups[mask], minlength=size)
+
+    total = np.maximum(np.bincount(groups, minlength=size), 1)
+    columns = ('correctYea', 'wrongYea', 'wrongNay', 'correctNay', 'GMP')
+    return DataFrame(dict(
+        correctYea=count(yea & predicted),
+        wrongYea=count(~yea & predicted),
+        wrongNay=count(yea & ~predicted),
+        correctNay=count(~yea & ~predicted),
+        GMP=np.exp(np.bincount(groups, log_likelihoods, minlength=size) /
+                   total)), columns=columns)
+
+
+def _minority(cols, yea, m):
+    yeas = np.bincount(cols[yea], minlength=m)
+    nays = np.bincount(cols[~yea], minlength=m)
+    return np.minimum(yeas, nays)
+
+
+def _native_wnominate(rollcall, polarity, dims=2, minvotes=20, lop=0.025,
+                      ubeta=15, uweights=0.5, verbose=False, start=None):
+    '''Fit W-NOMINATE with pscl.nominate and lay the results out like the
+    R package's nomObject. As in wnominate, roll calls whose minority
+    side has less than ``lop`` of the votes are left out, then so are
+    legislators with fewer than ``minvotes`` votes; they get NaN
+    coordinates. The bootstrap trials are run by wnominate(), and there
+    is no ``verbose`` output.
+
+    The estimator is vectorized but still slower than R's Fortran: a
+    two-dimensional fit of sen90 takes several seconds.
+    '''
+    if verbose:
+        warnings.warn('The numpy engine of wnominate has no verbose output.')
+    from . import nominate
+    legis_names, vote_names = rollcall.legis_names, rollcall.vote_names
+    n, m = rollcall.shape
+    filtered, legis_kept, votes_kept = rollcall.filter(
+        lop=lop, minvotes=minvotes, proportion=True)
+    rows, cols, yea = filtered.observed_votes()
+    keep_legis = np.zeros(n, dtype=bool)
+    keep_legis[legis_kept] = True
+    keep_votes = np.zeros(m, dtype=bool)
+    keep_votes[votes_kept] = True
+    legis_index = np.cumsum(keep_legis) - 1
+
+    polarity_rows = []
+    for legislator in _polarity_index(polarity, legis_names):
+        if not keep_legis[legislator]:
+            raise ValueError('Polarity legislator %r was dropped.' % (
+                legis_names[legislator],))
+        polarity_rows.append(legis_index[legislator])
+
+    if start is not None:
+        start = _start_values(
+            start, legis_names[keep_legis], vote_names[keep_votes],
+            rows, cols, yea, dims, uweights)
+    fit = nominate.wnominate(
+        rows, cols, yea, keep_legis.sum(), keep_votes.sum(), dims=dims,
+        polarity=polarity_rows, ubeta=ubeta, uweights=uweights, start=start)
+    return Wnominate(_nom_object(
+        rollcall, fit, rows, cols, yea, keep_legis, keep_votes, dims))
+
+
+def _row_names(frame):
+    if hasattr(frame, 'index'):
+        return list(frame.index)
+    return list(R.r['rownames'](frame))
+
+
+def _start_values(previous, legis_names, vote_names, rows, cols, yea, dims,
+                  uweights):
+    '''Line a previous fit up with the legislators and roll calls being
+    scaled, for each of the 1..dims dimensional stages. New legislators
+    and roll calls get NaN rows, and so do roll calls whose yea and nay
+    counts have changed since. Native fits keep the estimates of every
+    stage; otherwise each stage starts from the leading dimensions of
+    the final fit, and dimensions it didn't have start at zero.
+    '''
+    def aligned(frame, names, columns):
+        position = dict(
+            (name, row) for row, name in enumerate(_row_names(frame)))
+        values = np.zeros((len(names), len(columns)))
+        found = np.array([name in position for name in names], dtype=bool)
+        values[~found] = np.nan
+        index = [position[name] for name in names if name in position]
+        for column, key in enumerate(columns):
+            values[found, column] = np.asarray(
+                frame[key], dtype=float)[index]
+        return values
+
+    m = len(vote_names)
+    tallies = aligned(previous['rollcalls'], vote_names, (
+        'correctYea', 'wrongNay', 'wrongYea', 'correctNay'))
+    changed = (
+        (tallies[:, 0] + tallies[:, 1] !=
+         np.bincount(cols[yea], minlength=m)) |
+        (tallies[:, 2] + tallies[:, 3] !=
+         np.bincount(cols[~yea], minlength=m)))
+
+    stages = previous.get('stages') or []
+    start = []
+    for dims in range(1, dims + 1):
+        source = stages[dims - 1] if dims <= len(stages) else previous
+        weights = np.asarray(source['weights'], dtype=float)
+        previous_dims = min(dims, len(weights))
+
+        def coordinates(frame, names, prefix):
+            values = np.zeros((len(names), dims))
+            values[:, :previous_dims] = aligned(frame, names, [
+                '%s%dD' % (prefix, dim + 1) for dim in range(previous_dims)])
+            return values
+
+        midpoints = coordinates(source['rollcalls'], vote_names, 'midpoint')
+        spreads = coordinates(source['rollcalls'], vote_names, 'spread')
+        midpoints[changed] = spreads[changed] = np.nan
+        stage_weights = np.repeat(float(uweights), dims)
+        stage_weights[:previous_dims] = weights[:previous_dims]
+        start.append(dict(
+            coords=coordinates(source['legislators'], legis_names, 'coord'),
+            midpoints=midpoints, spreads=spreads,
+            beta=np.asarray(source['beta'], dtype=float)[0],
+            weights=stage_weights))
+    return start
+
+
+def _nom_object(rollcall, fit, rows, cols, yea, keep_legis, keep_votes,
+                dims):
+    '''Lay out a native fit like wnominate's nomObject, with a row for
+    every legislator and roll call (NaN for the ones left out).
+    '''
+    from . import nominate
+    legis_names, vote_names = rollcall.legis_names, rollcall.vote_names
+    model = nominate.Model(
+        rows, cols, yea, keep_legis.sum(), keep_votes.sum(), dims)
+    log_likelihoods, predicted = nominate.fit_statistics(model, fit)
+    minority = _minority(cols, yea, model.m)
+
+    legislators = _tallies(rows, model.n, yea, predicted, log_likelihoods)
+    correct = legislators['correctYea'] + legislators['correctNay']
+    total = correct + legislators['wrongYea'] + legislators['wrongNay']
+    legislators['CC'] = correct / total.astype(float)
+    for dim in range(dims):
+        legislators['coord%dD' % (dim + 1)] = fit['coords'][:, dim]
+    legislators.index = np.flatnonzero(keep_legis)
+    legislators = legislators.reindex(np.arange(len(keep_legis)))
+
+    # Join by position: legislator names needn't be unique.
+    legis_data = rollcall.get('legis.data')
+    if isinstance(legis_data, DataFrame):
+        legislators = legis_data.reset_index(drop=True).join(legislators)
+    legislators.index = legis_names
+
+    rollcalls = _tallies(cols, model.m, yea, predicted, log_likelihoods)
+    errors = rollcalls['wrongYea'] + rollcalls['wrongNay']
+    rollcalls['PRE'] = (minority - errors) / minority.astype(float)
+    for dim in range(dims):
+        rollcalls['spread%dD' % (dim + 1)] = fit['spreads'][:, dim]
+        rollcalls['midpoint%dD' % (dim + 1)] = fit['midpoints'][:, dim]
+    rollcalls.index = np.flatnonzero(keep_votes)
+    rollcalls = rollcalls.reindex(np.arange(len(keep_votes)))
+    rollcalls.index = vote_names
+
+    # Correct classification, APRE and GMP of the fits with 1..dims
+    # dimensions.
+    classified, apre, gmp = [], [], []
+    for stage in fit['stages']:
+        log_likelihoods, predicted = nominate.fit_statistics(model, stage)
+        wrong = predicted != yea
+        classified.append(1 - wrong.mean())
+        apre.append((minority.sum() - wrong.sum()) / float(minority.sum()))
+        gmp.append(np.exp(log_likelihoods.mean()))
+
+    # Keep the estimates of every stage, to warm start later refits.
+    def frame(values, keep, index, prefix):
+        columns = ['%s%dD' % (prefix, dim + 1)
+                   for dim in range(values.shape[1])]
+        frame = DataFrame(values, index=np.flatnonzero(keep), columns=columns)
+        frame = frame.reindex(np.arange(len(keep)))
+        frame.index = index
+        return frame
+
+    stages = [dict(
+        legislators=frame(stage['coords'], keep_legis, legis_names, 'coord'),
+        rollcalls=frame(
+            stage['midpoints'], keep_votes, vote_names, 'midpoint').join(
+            frame(stage['spreads'], keep_votes, vote_names, 'spread')),
+        beta=np.array([stage['beta']]),
+        weights=stage['weights']) for stage in fit['stages']]
+
+    return {
+        'legislators': legislators,
+        'rollcalls': rollcalls,
+        'dimensions': np.array([dims]),
+        'eigenvalues': fit['eigenvalues'],
+        'beta': np.array([fit['beta']]),
+        'weights': fit['weights'],
+        'fits': np.array(classified + apre + gmp),
+        'stages': stages}
+
+
+def _columns(frame, prefix, dims):
+    return np.column_stack([
+        np.asarray(frame['%s%dD' % (prefix, dim + 1)], dtype=float)
+        for dim in range(dims)])
+
+
+def _fitted_coords(result, dims):
+    return _columns(result.legislators, 'coord', dims)
+
+
+def _yea_probabilities(rollcall, result, dims):
+    '''Return the cast votes of the rollcall and each one's fitted
+    probability of being a yea (NaN for legislators and roll calls that
+    were left out of the fit).
+    '''
+    from scipy.special import ndtr
+    from . import nominate
+    rows, cols, yea = rollcall.observed_votes()
+    midpoints = _columns(result.rollcalls, 'midpoint', dims)
+    spreads = _columns(result.rollcalls, 'spread', dims)
+    model = nominate.Model(
+        rows, cols, yea, len(rollcall.legis_names), len(midpoints), dims)
+    _, _, yea_utility, nay_utility = model.utilities(
+        _fitted_coords(result, dims), midpoints, spreads,
+        np.array(result.weights, dtype=float))
+    utility = result.beta[0] * (yea_utility - nay_utility)
+    return rows, cols, ndtr(utility)
+
+
+def _run_trial(args):
+    '''Refit one bootstrap trial in a worker process: redraw the votes
+    with the given yea probabilities and return the new coordinates.
+    '''
+    from .rollcall import Rollcall
+    (engine, portable, polarity, kwargs, start, rows, cols, probabilities,
+     seed) = args
+    random = np.random.RandomState(seed)
+    fitted = ~np.isnan(probabilities)
+    yea = random.uniform(size=fitted.sum()) < probabilities[fitted]
+
+    # The cells redrawn are all cast votes, so a sparse matrix keeps its
+    # structure.
+    votes = portable['votes'].copy()
+    codes = portable['codes']
+    votes[rows[fitted], cols[fitted]] = np.where(
+        yea, codes['yea'][0], codes['nay'][0])
+    rollcall = Rollcall.from_portable(dict(portable, votes=votes), engine)
+    if start is not None:
+        start = Wnominate(start)
+    result = wnominate(
+        rollcall, polarity, engine=engine, trials=1, start=start, **kwargs)
+    return _fitted_coords(result, kwargs.get('dims', 2))
+
+
+def _bootstrap_wnominate(rollcall, polarity, engine, workers, start,
+                         kwargs):
+    from multiprocessing import Pool
+    kwargs = dict(kwargs)
+    trials = kwargs.pop('trials')
+    seed = kwargs.pop('seed', None)
+    if seed is None:
+        seed = np.random.randint(2 ** 30)
+    dims = kwargs.get('dims', 2)
+
+    result = wnominate(
+        rollcall, polarity, engine=engine, trials=1, start=start, **kwargs)
+    rows, cols, probabilities = _yea_probabilities(rollcall, result, dims)
+
+    # Native trials start from the point estimates.
+    start = result.obj if engine == 'numpy' else None
+    portable = rollcall.portable()
+    jobs = [(engine, portable, polarity, kwargs, start, rows, cols,
+             probabilities, seed + trial)
+            for trial in range(trials)]
+
+    workers = 1 if workers is None else workers
+    if workers > 1:
+        pool = Pool(min(workers, trials))
+        try:
+            coords = pool.map(_run_trial, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        coords = list(map(_run_trial, jobs))
+
+    errors = np.array(coords).std(axis=0, ddof=1)
+    return _with_standard_errors(result, errors)
+
+
+def _with_standard_errors(result, errors):
+    '''Fill in the se1D, se2D, ... columns of the legislators.
+    '''
+    names = ['se%dD' % (dim + 1) for dim in range(errors.shape[1])]
+    if isinstance(result.obj, dict):
+        legislators = result.obj['legislators'].copy()
+        for dim, name in enumerate(names):
+            legislators[name] = errors[:, dim]
+        return Wnominate(dict(result.obj, legislators=legislators))
+
+    obj = result.obj
+    set_legislators = R.r(_SET_LEGISLATORS)
+    for dim, name in enumerate(names):
+        obj = set_legislators(obj, name, _r_vector(errors[:, dim]))
+    return Wnominate(obj)
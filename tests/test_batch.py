@@ -0,0 +1,64 @@
+from os.path import join, dirname, abspath
+from unittest import TestCase
+
+from pscl.batch import Job, scale
+from pscl.ordfile import OrdFile
+from pscl.rollcall import Rollcall
+from pscl.wnominate import Wnominate
+from pscl.ideal import Ideal
+
+
+class BatchTest(TestCase):
+    '''Scale a few sources with the numpy engines in two workers.
+    '''
+    fixtures = join(dirname(abspath(__file__)), 'fixtures')
+    with open(join(fixtures, 'sen109kh.ord')) as f:
+        votes = OrdFile(f).as_dataframe()
+    with open(join(fixtures, 'sen90kh.ord')) as f:
+        rollcall = Rollcall.from_ordfile(f, engine='numpy')
+
+    jobs = [
+        Job(join(fixtures, 'sen90kh.ord'), key='sen90', polarity=(2,),
+            dims=1, engine='numpy'),
+        Job(votes, key='sen109', method='ideal', engine='numpy',
+            codes=dict(yea=[1, 2, 3], nay=[4, 5, 6], missing=[7, 8, 9],
+                       not_in_legis=[0]),
+            maxiter=200, burnin=100, thin=10, seed=0),
+        Job(join(fixtures, 'missing.ord'), key='missing', polarity=(1,),
+            engine='numpy'),
+        Job(rollcall, key='rollcall', method='ideal', engine='numpy',
+            maxiter=20, burnin=10, thin=10, seed=0)]
+
+    @classmethod
+    def setUpClass(cls):
+        # Not in the class body: workers forked while this module is being
+        # imported would inherit python 2's import lock.
+        cls.results = dict(
+            (result.key, result) for result in scale(cls.jobs, workers=2))
+
+    def test_all_jobs_finish(self):
+        self.assertEquals(
+            set(['sen90', 'sen109', 'missing', 'rollcall']),
+            set(self.results))
+
+    def test_results(self):
+        sen90 = self.results['sen90']
+        self.assertEquals(None, sen90.error)
+        self.assertTrue(isinstance(sen90.value, Wnominate))
+        self.assertEquals(102, len(sen90.value.legislators.coord1D))
+
+        sen109 = self.results['sen109']
+        self.assertEquals(None, sen109.error)
+        self.assertTrue(isinstance(sen109.value, Ideal))
+        self.assertEquals(102, sen109.value.n)
+
+        rollcall = self.results['rollcall']
+        self.assertEquals(None, rollcall.error)
+        self.assertEquals(
+            list(self.rollcall.legis_names),
+            list(rollcall.value['xbar'].index))
+
+    def test_failures_are_isolated(self):
+        missing = self.results['missing']
+        self.assertEquals(None, missing.value)
+        self.assertTrue('IOError' in missing.error)
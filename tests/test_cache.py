@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import time
+from os import listdir
+from os.path import join, dirname, abspath, exists, getsize
+from unittest import TestCase
+
+import numpy as np
+
+from pscl.cache import ResultCache
+from pscl.ideal import ideal
+from pscl.rollcall import Rollcall
+from pscl.utils import cd
+
+
+def counted_ideal(rollcall, **kwargs):
+    '''The same name as ResultCacheTest.counted_ideal, but another
+    function.
+    '''
+    counted_ideal.calls += 1
+    return ideal(rollcall, **kwargs)
+counted_ideal.calls = 0
+
+
+class ResultCacheTest(TestCase):
+    '''Cache results of the numpy engines in a temporary directory.
+    '''
+    here = dirname(abspath(__file__))
+    with cd(join(here, 'fixtures')):
+        with open('sen90kh.ord') as f:
+            rollcall = Rollcall.from_ordfile(f, engine='numpy')
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def counted_ideal(self, rollcall, **kwargs):
+        self.calls.append(kwargs)
+        return ideal(rollcall, **kwargs)
+
+    def fit(self, cache, seed=0):
+        return cache.apply(
+            self.counted_ideal, self.rollcall, engine='numpy', maxiter=40,
+            burnin=20, thin=10, seed=seed)
+
+    def test_hit(self):
+        cache = ResultCache(self.path)
+        first, second = self.fit(cache), self.fit(cache)
+        self.assertEquals(1, len(self.calls))
+        self.assertEquals(first.n, second.n)
+        self.assertEquals(first.xbar, second.xbar)
+        self.assertTrue(np.array_equal(first['x'], second['x']))
+
+    def test_arguments_are_part_of_the_key(self):
+        cache = ResultCache(self.path)
+        self.fit(cache, seed=0)
+        self.fit(cache, seed=1)
+        self.assertEquals(2, len(self.calls))
+
+    def test_wnominate(self):
+        cache = ResultCache(self.path)
+        first = cache.wnominate(
+            self.rollcall, (2,), dims=1, engine='numpy')
+        second = cache.wnominate(
+            self.rollcall, (2,), dims=1, engine='numpy')
+        self.assertEquals(first.fits, second.fits)
+        self.assertEquals(
+            first.legislators.coord1D, second.legislators.coord1D)
+        # Left-out roll calls have NaN midpoints.
+        np.testing.assert_array_equal(
+            first.rollcalls.midpoint1D, second.rollcalls.midpoint1D)
+
+    def test_eviction(self):
+        cache = ResultCache(self.path)
+        self.fit(cache, seed=0)
+        first, = listdir(self.path)
+        cache.max_bytes = 1.5 * getsize(join(self.path, first))
+        self.fit(cache, seed=1)
+        self.assertEquals(1, len(listdir(self.path)))
+        self.assertFalse(exists(join(self.path, first)))
+
+    def test_corrupt_entry(self):
+        cache = ResultCache(self.path)
+        self.fit(cache)
+        name, = listdir(self.path)
+        filename = join(self.path, name)
+        with open(filename, 'rb') as f:
+            data = f.read()
+        for corrupt in (data[:len(data) // 2], b'garbage', b''):
+            with open(filename, 'wb') as f:
+                f.write(corrupt)
+            self.assertEquals(None, cache.get(name[:-len('.npz')]))
+            self.assertFalse(exists(filename))
+        # An .npz file that isn't a result.
+        np.savez(filename, x=np.zeros(3))
+        self.assertEquals(None, cache.get(name[:-len('.npz')]))
+        self.assertFalse(exists(filename))
+        # Then it's a miss, and is computed and stored again.
+        self.fit(cache)
+        self.assertEquals(2, len(self.calls))
+        self.assertEquals([name], listdir(self.path))
+
+    def test_functions_with_the_same_name(self):
+        cache = ResultCache(self.path)
+        self.fit(cache)
+        calls = counted_ideal.calls
+        cache.apply(counted_ideal, self.rollcall, engine='numpy', maxiter=40,
+                    burnin=20, thin=10, seed=0)
+        self.assertEquals(calls + 1, counted_ideal.calls)
+        self.assertEquals(2, len(listdir(self.path)))
+
+    def test_stale_temporary_files(self):
+        stale = join(self.path, 'stale.tmp')
+        fresh = join(self.path, 'fresh.tmp')
+        for filename in (stale, fresh):
+            open(filename, 'wb').close()
+        day_ago = time.time() - 24 * 60 * 60
+        os.utime(stale, (day_ago, day_ago))
+        self.fit(ResultCache(self.path))
+        self.assertFalse(exists(stale))
+        # It might still be being written.
+        self.assertTrue(exists(fresh))
@@ -0,0 +1,172 @@
+from unittest import TestCase
+
+import numpy as np
+from pandas import DataFrame, Series
+
+from pscl import convert
+from pscl.convert import (
+    flatten, to_array, to_labeled_array, to_r_data_frame, to_r_matrix)
+from pscl.utils import R
+
+
+class ConvertTest(TestCase):
+    '''Conversions of the python values that native results hold in
+    place of R vectors.
+    '''
+    frame = DataFrame([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]],
+                      index=['a', 'b', 'c'], columns=['D1', 'D2'])
+
+    def test_to_array(self):
+        array = to_array(self.frame)
+        self.assertEquals((3, 2), array.shape)
+        self.assertEquals([1.0, 2.0], list(array[0]))
+        self.assertEquals((3,), to_array(self.frame['D1']).shape)
+        values = np.zeros((4, 3, 2))
+        self.assertTrue(to_array(values) is values)
+
+    def test_to_labeled_array(self):
+        self.assertTrue(to_labeled_array(self.frame) is self.frame)
+        series = to_labeled_array(self.frame['D2'])
+        self.assertEquals(['a', 'b', 'c'], list(series.index))
+        values = np.arange(6.0).reshape(3, 2)
+        self.assertTrue(to_labeled_array(values) is values)
+
+    def test_flatten(self):
+        # Column-major, as R iterates over a matrix.
+        self.assertEquals([1.0, 3.0, 5.0, 2.0, 4.0, 6.0],
+                          list(flatten(self.frame)))
+        self.assertEquals([1.0, 2.0], list(flatten(Series([1.0, 2.0]))))
+        self.assertEquals(1.0, flatten(1.0))
+
+
+class FakeRFunctions(object):
+    '''Stands in for R.r: allocates vectors as numpy arrays, and returns
+    what the other functions were called with.
+    '''
+    def __getitem__(self, name):
+        return dict(integer=lambda n: np.zeros(n, dtype=np.int32),
+                    numeric=lambda n: np.zeros(n))[name]
+
+    def list(self, *elements):
+        return list(elements)
+
+    def matrix(self, vector, **kwargs):
+        return dict(kwargs, vector=vector)
+
+    def __call__(self, code):
+        # R functions from source, like the data.frame builder.
+        return lambda *args: args
+
+
+class FakeR(object):
+    '''Stands in for utils.R, so the conversions to R can be checked
+    without rpy2.
+    '''
+    NULL = 'NULL'
+
+    def __init__(self):
+        self.r = FakeRFunctions()
+        self.robjects = self
+
+    def StrVector(self, values):
+        return ('StrVector', list(values))
+
+    def BoolVector(self, values):
+        return ('BoolVector', list(values))
+
+
+class ToRMatrixTest(TestCase):
+    '''Check what to_r_matrix hands to R, with a fake R.
+    '''
+    def setUp(self):
+        self.R, convert.R = convert.R, FakeR()
+
+    def tearDown(self):
+        convert.R = self.R
+
+    def test_column_major(self):
+        matrix = to_r_matrix(DataFrame(
+            [[1, 2, 3], [4, 5, 6]], index=['a', 'b'],
+            columns=['x', 'y', 'z']))
+        self.assertEquals(np.int32, matrix['vector'].dtype)
+        self.assertEquals([1, 4, 2, 5, 3, 6], list(matrix['vector']))
+        self.assertEquals((2, 3), (matrix['nrow'], matrix['ncol']))
+        self.assertEquals(
+            [('StrVector', ['a', 'b']), ('StrVector', ['x', 'y', 'z'])],
+            matrix['dimnames'])
+
+    def test_integer_or_numeric(self):
+        matrix = to_r_matrix(np.array([[True, False], [False, True]]))
+        self.assertEquals(np.int32, matrix['vector'].dtype)
+        self.assertEquals([1, 0, 0, 1], list(matrix['vector']))
+        self.assertEquals(['NULL', 'NULL'], matrix['dimnames'])
+
+        floats = np.array([[1.5, 2.0]])
+        self.assertEquals(np.float64, to_r_matrix(floats)['vector'].dtype)
+        self.assertEquals(
+            np.int32, to_r_matrix(floats, integer=True)['vector'].dtype)
+        matrix = to_r_matrix(np.array([[1, 2]], dtype=np.int8),
+                             integer=False)
+        self.assertEquals(np.float64, matrix['vector'].dtype)
+        self.assertEquals([1.0, 2.0], list(matrix['vector']))
+
+    def test_dimnames(self):
+        frame = DataFrame([[1.0, 2.0]], index=['a'], columns=['x', 'y'])
+        matrix = to_r_matrix(frame, rownames=['b'])
+        self.assertEquals(
+            [('StrVector', ['b']), ('StrVector', ['x', 'y'])],
+            matrix['dimnames'])
+        matrix = to_r_matrix(frame.values, colnames=[1, 2])
+        self.assertEquals(
+            ['NULL', ('StrVector', ['1', '2'])], matrix['dimnames'])
+
+    def test_data_frame(self):
+        frame = DataFrame(
+            dict(party=['D', 'R'], seniority=[3, 1], chair=[True, False],
+                 score=[0.5, -0.25]),
+            index=['a', 'b'], columns=['party', 'seniority', 'chair', 'score'])
+        columns, names, rownames = to_r_data_frame(frame)
+        party, seniority, chair, score = columns
+        self.assertEquals(('StrVector', ['D', 'R']), party)
+        self.assertEquals(np.int32, seniority.dtype)
+        self.assertEquals([3, 1], list(seniority))
+        self.assertEquals(('BoolVector', [True, False]), chair)
+        self.assertEquals([0.5, -0.25], list(score))
+        self.assertEquals(
+            ('StrVector', ['party', 'seniority', 'chair', 'score']), names)
+        self.assertEquals(('StrVector', ['a', 'b']), rownames)
+
+
+class RConvertTest(TestCase):
+    '''Conversions of R vectors and matrices, which need rpy2.
+    '''
+    def setUp(self):
+        try:
+            R.robjects
+        except ImportError:
+            self.skipTest('rpy2 is not installed.')
+
+    def test_matrix(self):
+        matrix = R.r(
+            'matrix(1:6 + 0.5, nrow=3, '
+            'dimnames=list(c("a", "b", "c"), c("D1", "D2")))')
+        array = to_array(matrix)
+        self.assertEquals((3, 2), array.shape)
+        self.assertEquals([1.5, 4.5], list(array[0]))
+        frame = to_labeled_array(matrix)
+        self.assertEquals(['a', 'b', 'c'], list(frame.index))
+        self.assertEquals(['D1', 'D2'], list(frame.columns))
+        self.assertEquals(5.5, frame.loc['b', 'D2'])
+
+    def test_vector(self):
+        series = to_labeled_array(R.r('c(x=1.5, y=2.5)'))
+        self.assertEquals(['x', 'y'], list(series.index))
+        self.assertEquals([1.5, 2.5], list(series))
+        self.assertEquals((2,), to_array(R.r('c(1.5, 2.5)')).shape)
+
+    def test_to_r_matrix(self):
+        frame = to_labeled_array(to_r_matrix(ConvertTest.frame))
+        self.assertEquals(['a', 'b', 'c'], list(frame.index))
+        self.assertEquals(['D1', 'D2'], list(frame.columns))
+        self.assertEquals([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]],
+                          frame.values.tolist())
@@ -0,0 +1,51 @@
+from os.path import join, dirname, abspath
+from unittest import TestCase
+
+from pscl.rollcall import Rollcall
+from pscl.ordfile import OrdFile
+from pscl.utils import cd
+
+
+class NativeIdealTest(TestCase):
+    '''Fit a short chain with the numpy engine, which doesn't need R.
+    '''
+    here = dirname(abspath(__file__))
+    with cd(join(here, 'fixtures')):
+        with open('sen109kh.ord') as f:
+            legislators, _ = OrdFile(f).as_arrays()
+            rollcall = Rollcall.from_ordfile(f, engine='numpy')
+
+    ideal = rollcall.ideal(
+        engine='numpy', d=1, maxiter=300, burnin=100, thin=10,
+        normalize=True, store_item=True, seed=0)
+
+    def test_dimensions(self):
+        self.assertEquals(102, self.ideal.n)
+        self.assertEquals(1, self.ideal.d)
+        self.assertEquals((20, 102, 1), self.ideal['x'].shape)
+        self.assertEquals(
+            (self.ideal.m, 2), self.ideal['betabar'].shape)
+
+    def test_parties_separate(self):
+        xbar = self.ideal.xbar
+        parties = dict(zip(self.legislators['name'],
+                           self.legislators['party_code']))
+        democrats = [xbar[name] for name, party in parties.items()
+                     if party == '100']
+        republicans = [xbar[name] for name, party in parties.items()
+                       if party == '200']
+        mean_democrat = sum(democrats) / len(democrats)
+        mean_republican = sum(republicans) / len(republicans)
+        self.assertTrue(mean_democrat * mean_republican < 0)
+        self.assertTrue(abs(mean_democrat - mean_republican) > 1)
+
+    def test_multiple_chains(self):
+        ideal = self.rollcall.ideal(
+            engine='numpy', chains=2, workers=2, d=1, maxiter=300,
+            burnin=100, thin=10, normalize=True, seed=0)
+        self.assertEquals(2, ideal.chains)
+        self.assertEquals((40, 102, 1), ideal['x'].shape)
+        self.assertEquals(
+            list(self.rollcall.vote_matrix.index), list(ideal.rhat.index))
+        self.assertEquals((102, 1), ideal.n_eff.shape)
+        self.assertTrue(ideal.rhat['D1'].median() < 1.5)
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+from os.path import dirname, abspath
+from unittest import TestCase
+
+
+class ImportTest(TestCase):
+    '''Importing pscl shouldn't start R or load the native engines, which
+    are imported when they're first used.
+    '''
+    def imported(self, statement):
+        script = '%s; import sys; print(" ".join(sys.modules))' % statement
+        output = subprocess.check_output(
+            [sys.executable, '-c', script],
+            cwd=dirname(dirname(abspath(__file__))))
+        return set(output.split())
+
+    def test_import_pscl(self):
+        modules = self.imported('import pscl')
+        for name in ('rpy2', 'pscl.irt', 'pscl.nominate', 'pscl.diagnostics',
+                     'scipy.optimize', 'scipy.sparse.linalg'):
+            self.assertFalse(name in modules, name)
+
+    def test_import_ordfile(self):
+        modules = self.imported('from pscl.ordfile import OrdFile')
+        self.assertFalse('rpy2' in modules)
+        self.assertFalse('scipy.optimize' in modules)
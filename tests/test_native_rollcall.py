@@ -0,0 +1,232 @@
+from os.path import join, dirname, abspath
+from unittest import TestCase
+
+import numpy as np
+from pandas import DataFrame
+from scipy.sparse import csr_matrix
+
+from pscl.batch import Job
+from pscl.cache import result_key
+from pscl.pool import _request
+from pscl.rollcall import Rollcall, VoteMatrix
+from pscl.ext.openstates import RollcallBuilder
+from pscl.utils import cd
+
+
+class NativeRollcallTest(TestCase):
+    '''Rollcall methods that work in python, on a small vote matrix.
+    '''
+    votes = DataFrame(
+        [[1, 1, 1, 1],
+         [1, 1, 1, 1],
+         [1, 1, 6, 6],
+         [1, 6, 6, 9]],
+        index=['a', 'b', 'c', 'd'], columns=['v1', 'v2', 'v3', 'v4'])
+    legis_data = DataFrame(
+        dict(party=['D', 'D', 'R', 'R']), index=['a', 'b', 'c', 'd'])
+
+    def rollcall(self):
+        return Rollcall.from_dataframe(
+            self.votes, engine='numpy', yea=1, nay=6, missing=9,
+            not_in_legis=0, legis_data=self.legis_data)
+
+    def test_filter(self):
+        filtered, rows, cols = self.rollcall().filter()
+        self.assertEquals([0, 1, 2, 3], list(rows))
+        self.assertEquals([1, 2, 3], list(cols))
+        self.assertEquals(
+            ['v2', 'v3', 'v4'], list(filtered.vote_matrix.columns))
+        self.assertEquals((4, 3), filtered.vote_matrix.shape)
+
+    def test_filter_lop_and_minvotes(self):
+        filtered, rows, cols = self.rollcall().filter(lop=1, minvotes=1)
+        self.assertEquals([2], list(cols))
+        self.assertEquals([0, 1, 2, 3], list(rows))
+
+        filtered, rows, cols = self.rollcall().filter(minvotes=3)
+        self.assertEquals([0, 1, 2], list(rows))
+        self.assertEquals(['D', 'D', 'R'],
+                          list(filtered['legis.data']['party']))
+
+    def test_filter_proportion(self):
+        # v2 and v4 have 1/4 and 1/3 of their votes in the minority.
+        filtered, rows, cols = self.rollcall().filter(
+            lop=0.3, proportion=True)
+        self.assertEquals([2, 3], list(cols))
+
+    def test_filter_proportion_boundary(self):
+        # A minority of exactly lop is kept: 1 nay out of 40 at 2.5%, and
+        # 3 out of 30 at 10%, where 0.1 * 30 rounds up.
+        votes = DataFrame(np.ones((40, 3), dtype=int))
+        votes.iloc[0] = 6
+        votes.iloc[1:3, 2] = 6
+        votes.iloc[30:, 2] = 9
+        rollcall = Rollcall.from_dataframe(
+            votes, engine='numpy', yea=1, nay=6, missing=9)
+        filtered, rows, cols = rollcall.filter(lop=0.025, proportion=True)
+        self.assertEquals([0, 1, 2], list(cols))
+        filtered, rows, cols = rollcall.filter(lop=0.1, proportion=True)
+        self.assertEquals([2], list(cols))
+        filtered, rows, cols = rollcall.filter(lop=0.026, proportion=True)
+        self.assertEquals([2], list(cols))
+
+    def test_drop_unanimous(self):
+        rollcall = self.rollcall().drop_unanimous(lop=1)
+        self.assertEquals(['v3'], list(rollcall.vote_matrix.columns))
+        self.assertEquals((1.0,), rollcall.codes['yea'])
+
+    def test_summary(self):
+        summary = self.rollcall().summary()
+        self.assertEquals((4,), summary.n)
+        self.assertEquals((4,), summary.m)
+        self.assertEquals(
+            ['1 (yea)', '6 (nay)', '9 (missing)'],
+            list(summary['allVotes'].index))
+        self.assertEquals((11, 4, 1, 68.75, 25.0, 6.25), summary.all_votes)
+        self.assertEquals(
+            [4, 0, 0, 0], list(summary.legislator_tallies.loc['a']))
+        self.assertEquals(
+            [2, 1, 1, 0], list(summary.vote_tallies.loc['v4']))
+        self.assertEquals(self.rollcall().summary(), summary)
+
+    def test_summary_of_floats(self):
+        rollcall = Rollcall.from_dataframe(
+            self.votes.astype(float), engine='numpy', yea=1, nay=6,
+            missing=9, not_in_legis=0)
+        self.assertEquals(self.rollcall().summary(), rollcall.summary())
+
+    def test_summary_of_nans(self):
+        votes = self.votes.astype(float)
+        votes[votes == 9] = np.nan
+        votes.iloc[0, 0] = votes.iloc[1, 1] = np.nan
+        rollcall = Rollcall.from_dataframe(
+            votes, engine='numpy', yea=1, nay=6, missing=np.nan,
+            not_in_legis=0)
+        summary = rollcall.summary()
+        self.assertEquals(
+            ['1 (yea)', '6 (nay)', 'NA (missing)'],
+            list(summary['allVotes'].index))
+        self.assertEquals((9, 4, 3), summary.all_votes[:3])
+        self.assertEquals(
+            [3, 0, 1, 0], list(summary.legislator_tallies.loc['a']))
+
+    def test_summary_of_wide_int8_codes(self):
+        # 100 - (-100) doesn't fit in int8.
+        votes = DataFrame(np.array(
+            [[100, -100], [-100, 100], [100, 0]], dtype=np.int8))
+        rollcall = Rollcall.from_dataframe(
+            votes, engine='numpy', yea=100, nay=-100, not_in_legis=0)
+        summary = rollcall.summary()
+        self.assertEquals(
+            ['-100 (nay)', '0 (notInLegis)', '100 (yea)'],
+            list(summary['allVotes'].index))
+        self.assertEquals((2, 1, 3), summary.all_votes[:3])
+
+    def test_summary_of_bools(self):
+        votes = DataFrame([[True, False], [True, True]])
+        rollcall = Rollcall.from_dataframe(
+            votes, engine='numpy', yea=True, nay=False)
+        summary = rollcall.summary()
+        self.assertEquals(
+            ['0 (nay)', '1 (yea)'], list(summary['allVotes'].index))
+        self.assertEquals((1, 3), summary.all_votes[:2])
+
+    def test_portable(self):
+        rollcall = Rollcall.from_portable(
+            self.rollcall().portable(), engine='numpy')
+        self.assertEquals(self.rollcall(), rollcall)
+        self.assertEquals(
+            list(self.votes.index), list(rollcall.vote_matrix.index))
+        self.assertTrue((self.votes == rollcall.vote_matrix).all().all())
+
+
+class SparseRollcallTest(TestCase):
+    '''A rollcall held in a sparse matrix should behave like the same
+    rollcall held in a DataFrame.
+    '''
+    here = dirname(abspath(__file__))
+    with cd(join(here, 'fixtures')):
+        with open('sen109kh.ord') as f:
+            dense = Rollcall.from_ordfile(f, engine='numpy')
+    votes = dense.vote_matrix
+    sparse = Rollcall.from_dataframe(
+        csr_matrix(votes.values), engine='numpy', yea=[1, 2, 3],
+        nay=[4, 5, 6], missing=[7, 8, 9], not_in_legis=0,
+        legis_names=votes.index, vote_names=votes.columns)
+
+    def test_layout(self):
+        self.assertTrue(self.sparse.is_sparse)
+        self.assertFalse(self.dense.is_sparse)
+        self.assertEquals(self.dense.shape, self.sparse.shape)
+        self.assertEquals(self.dense.n, self.sparse.n)
+        self.assertTrue((self.votes == self.sparse.vote_matrix).all().all())
+
+    def test_observed_votes(self):
+        for dense, sparse in zip(self.dense.observed_votes(),
+                                 self.sparse.observed_votes()):
+            np.testing.assert_array_equal(dense, sparse)
+
+    def test_filter(self):
+        dense = self.dense.filter(lop=5, minvotes=20)
+        sparse = self.sparse.filter(lop=5, minvotes=20)
+        self.assertTrue(sparse[0].is_sparse)
+        np.testing.assert_array_equal(dense[1], sparse[1])
+        np.testing.assert_array_equal(dense[2], sparse[2])
+        self.assertEquals(
+            list(dense[0].vote_matrix.columns), list(sparse[0].vote_names))
+
+    def test_summary(self):
+        dense, sparse = self.dense.summary(), self.sparse.summary()
+        self.assertEquals(dense, sparse)
+        np.testing.assert_array_equal(
+            dense.legislator_tallies, sparse.legislator_tallies)
+        np.testing.assert_array_equal(
+            dense.vote_tallies, sparse.vote_tallies)
+
+    def test_ideal(self):
+        kwargs = dict(engine='numpy', maxiter=30, burnin=10, thin=10, seed=0)
+        np.testing.assert_allclose(
+            self.dense.ideal(**kwargs)['xbar'].values,
+            self.sparse.ideal(**kwargs)['xbar'].values)
+
+    def test_not_expanded(self):
+        rollcall = Rollcall(self.sparse.obj)
+        self.assertEquals(result_key('ideal', rollcall), result_key(
+            'ideal', Rollcall(dict(self.sparse.obj))))
+        self.assertNotEquals(
+            result_key('ideal', rollcall), result_key('ideal', self.dense))
+        job = Job(rollcall, engine='numpy').portable()
+        self.assertTrue(job.rollcall().is_sparse)
+        _request('ideal', rollcall, (), {})
+        rollcall.ideal(engine='numpy', chains=2, workers=1, maxiter=20,
+                       burnin=10, thin=10, seed=0)
+        self.assertFalse(
+            (VoteMatrix, 'votes') in rollcall._accessor_cache)
+
+    def test_builder(self):
+        builder = RollcallBuilder(set(['a', 'b', 'c']))
+        builder.add_vote(dict(
+            id='v1', yes_votes=[dict(leg_id='a'), dict(leg_id='b')],
+            no_votes=[dict(leg_id='c')], other_votes=[]))
+        builder.add_vote(dict(
+            id='v2', yes_votes=[dict(leg_id='a')], no_votes=[],
+            other_votes=[dict(leg_id='b'), dict(leg_id='z')]))
+        rollcall = builder.get_rollcall(sparse=True)
+        self.assertTrue(rollcall.is_sparse)
+        self.assertEquals(5, rollcall['votes'].nnz)
+        summary = rollcall.summary()
+        self.assertEquals(
+            [1, 0, 1, 1], list(summary.vote_tallies.loc['v2']))
+
+    def test_builder_keeps_last_vote(self):
+        builder = RollcallBuilder(['a', 'b'])
+        builder.add_vote(dict(
+            id='v1', yes_votes=[dict(leg_id='b'), dict(leg_id=None)],
+            no_votes=[dict(leg_id='a')], other_votes=[]))
+        builder.add_vote(dict(
+            id='v1', yes_votes=[dict(leg_id='a')], no_votes=[],
+            other_votes=[]))
+        self.assertEquals(['b', 'a'], builder.leg_ids)
+        self.assertEquals(3, len(builder.codes))
+        rollcall = builder.get_rollcall(sparse=True)
+        self.assertEquals([1.0, 1.0], list(rollcall.vote_matrix['v1']))
@@ -0,0 +1,112 @@
+import warnings
+from os.path import join, dirname, abspath, exists
+from unittest import TestCase
+
+import numpy as np
+import pandas
+
+from pscl.rollcall import Rollcall
+from pscl.utils import cd
+
+
+class NativeWnominateTest(TestCase):
+    '''Scale sen90 with the numpy engine, which doesn't need R.
+    '''
+    here = dirname(abspath(__file__))
+    with cd(join(here, 'fixtures')):
+        with open('sen90kh.ord') as f:
+            rollcall = Rollcall.from_ordfile(f, engine='numpy')
+
+    wnominate = rollcall.wnominate(polarity=(2, 5), engine='numpy')
+
+    def test_layout(self):
+        legislators = self.wnominate.legislators
+        rollcalls = self.wnominate.rollcalls
+        self.assertEquals(102, len(legislators.coord1D))
+        self.assertEquals(len(legislators.coord1D), len(legislators.coord2D))
+        self.assertEquals(self.rollcall.vote_matrix.shape[1],
+                          len(rollcalls.midpoint1D))
+        self.assertEquals(2, len(self.wnominate.weights))
+        self.assertEquals(6, len(self.wnominate.fits))
+
+    def test_polarity(self):
+        coords = self.wnominate['legislators']
+        self.assertTrue(coords['coord1D'].iloc[1] > 0)
+        self.assertTrue(coords['coord2D'].iloc[4] > 0)
+
+    def test_within_unit_circle(self):
+        coords = self.wnominate['legislators']
+        radius = np.sqrt(coords['coord1D'] ** 2 + coords['coord2D'] ** 2)
+        self.assertTrue((radius.dropna() <= 1 + 1e-9).all())
+
+    def test_fits(self):
+        classified_1d, classified_2d = self.wnominate.fits[:2]
+        self.assertTrue(classified_1d > 0.75)
+        self.assertTrue(classified_2d >= classified_1d)
+
+    def test_bootstrap(self):
+        wnominate = self.rollcall.wnominate(
+            polarity=(2,), engine='numpy', dims=1, trials=4, workers=2,
+            seed=0)
+        errors = wnominate['legislators']['se1D'].dropna()
+        self.assertEquals(
+            len(wnominate['legislators']['coord1D'].dropna()), len(errors))
+        # Legislators pinned to the unit circle can have no spread.
+        self.assertTrue((errors >= 0).all())
+        self.assertTrue(0 < errors.median() < 0.5)
+
+    def test_warm_start(self):
+        # Change the last roll call and refit from the earlier estimates.
+        votes = self.rollcall.vote_matrix.copy()
+        votes[votes.columns[-1]] = votes[votes.columns[-1]].replace(
+            {1: 6, 6: 1})
+        rollcall = Rollcall.from_dataframe(
+            votes, engine='numpy', yea=[1, 2, 3], nay=[4, 5, 6],
+            missing=[7, 8, 9], not_in_legis=[0])
+        wnominate = rollcall.wnominate(
+            polarity=(2, 5), engine='numpy', start=self.wnominate)
+        before = self.wnominate['legislators']['coord1D']
+        after = wnominate['legislators']['coord1D']
+        self.assertTrue(np.corrcoef(before, after)[0, 1] > 0.99)
+        self.assertTrue(abs(self.wnominate.fits[0] - wnominate.fits[0]) < 0.01)
+
+    def test_verbose_warns(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.rollcall.wnominate(
+                polarity=(2,), engine='numpy', dims=1, verbose=True)
+        self.assertEquals(1, len(caught))
+        self.assertTrue('verbose' in str(caught[0].message))
+
+    def test_duplicate_names(self):
+        # Ord files can give two legislators the same short name.
+        votes = self.rollcall.vote_matrix.copy()
+        legis_data = self.rollcall['legis.data'].copy()
+        names = list(votes.index)
+        names[3] = names[4]
+        votes.index = legis_data.index = names
+        rollcall = Rollcall.from_dataframe(
+            votes, engine='numpy', yea=[1, 2, 3], nay=[4, 5, 6],
+            missing=[7, 8, 9], not_in_legis=[0], legis_data=legis_data)
+        legislators = rollcall.wnominate(
+            polarity=(2,), engine='numpy', dims=1)['legislators']
+        self.assertEquals(102, len(legislators))
+        self.assertEquals(names, list(legislators.index))
+        self.assertEquals(
+            list(legis_data['party_code']), list(legislators['party_code']))
+
+    def test_r_reference(self):
+        # The coordinates R's wnominate(sen90, polarity=c(2, 5)) gives;
+        # see sen90_wnominate.R.
+        path = join(self.here, 'fixtures', 'sen90_wnominate.csv')
+        self.assertTrue(
+            exists(path), 'Run fixtures/sen90_wnominate.R to make %s.' % path)
+        expected = pandas.read_csv(path, index_col=0)
+        found = self.wnominate['legislators']
+        for column in ('coord1D', 'coord2D'):
+            both = pandas.DataFrame(dict(
+                expected=expected[column].values,
+                found=found[column].values)).dropna()
+            self.assertTrue(both.corr().values[0, 1] > 0.95)
+            self.assertTrue(
+                (both['expected'] - both['found']).abs().mean() < 0.1)
@@ -0,0 +1,132 @@
+import copy
+import shutil
+import tempfile
+import threading
+from os import listdir
+from os.path import join
+from unittest import TestCase
+
+from pscl.ext.openstates import build, ResponseCache, RollcallBuilder
+
+
+def _vote(id, chamber, yes, no, other=()):
+    return dict(
+        id=id, chamber=chamber,
+        yes_votes=[dict(leg_id=leg_id) for leg_id in yes],
+        no_votes=[dict(leg_id=leg_id) for leg_id in no],
+        other_votes=[dict(leg_id=leg_id) for leg_id in other])
+
+
+# The responses of a small, made up Open States API.
+RESPONSES = {
+    'legislators': [dict(id='a'), dict(id='b'), dict(id='c')],
+    'bills': [
+        dict(id='hb1', updated_at='2014-01-01 00:00:00'),
+        dict(id='hb2', updated_at='2014-01-01 00:00:00'),
+        dict(id='hb3', updated_at='2014-01-01 00:00:00')],
+    'hb1': dict(chamber='lower', votes=[
+        _vote('v1', 'lower', ['a', 'b'], ['c']),
+        _vote('v2', 'upper', ['x'], ['y'])]),
+    'hb2': dict(chamber='lower', votes=[
+        _vote('v3', 'lower', ['a'], ['b', 'c'])]),
+    'hb3': dict(chamber='lower', votes=[
+        _vote('v4', 'lower', ['c'], ['a'], ['b'])]),
+    }
+
+
+class PipelineTest(TestCase):
+    '''Build rollcalls with a fetch function that serves RESPONSES, so no
+    network is needed.
+    '''
+    spec = dict(state='zz', chamber='lower')
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.responses = copy.deepcopy(RESPONSES)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def fetch(self, method, *args, **kwargs):
+        with self.lock:
+            self.requests.append(method)
+        if method == 'bill':
+            return self.responses[args[0]]
+        self.assertEquals(self.spec, kwargs)
+        return self.responses[method]
+
+    def offline(self, method, *args, **kwargs):
+        raise IOError('No network.')
+
+    def test_build(self):
+        builder = build(self.spec, fetch=self.fetch, workers=3)
+        self.assertEquals(['a', 'b', 'c'], builder.leg_ids)
+        self.assertEquals(['v1', 'v3', 'v4'], builder.vote_ids)
+        self.assertEquals(3, self.requests.count('bill'))
+        votes = builder.get_rollcall(sparse=True).vote_matrix
+        self.assertEquals([1, 1, 2], list(votes['v1']))
+        self.assertEquals([2, 3, 1], list(votes['v4']))
+
+    def test_sparse_na(self):
+        builder = build(self.spec, fetch=self.fetch)
+        rollcall = builder.get_rollcall(sparse=True)
+        self.assertEquals((0.0,), rollcall.codes['notInLegis'])
+
+        # The implicit cells of the sparse matrix can only stand for 0.
+        builder = build(self.spec, fetch=self.fetch,
+                        builder=RollcallBuilder(['a', 'b', 'c'], NA=-1))
+        self.assertRaises(ValueError, builder.get_rollcall, sparse=True)
+
+    def test_cache(self):
+        build(self.spec, fetch=self.fetch, cache=self.path)
+        self.assertEquals(5, len(self.requests))
+        builder = build(self.spec, fetch=self.offline, cache=self.path)
+        self.assertEquals(['v1', 'v3', 'v4'], builder.vote_ids)
+
+    def test_refresh(self):
+        build(self.spec, fetch=self.fetch, cache=self.path)
+        cache = ResponseCache(self.fetch, self.path, refresh=['bills'])
+        build(self.spec, cache=cache)
+        self.assertEquals(
+            ['legislators', 'bills', 'bill', 'bill', 'bill', 'bills'],
+            self.requests)
+
+    def test_updated_bill(self):
+        build(self.spec, fetch=self.fetch, cache=self.path)
+        files = sorted(listdir(self.path))
+
+        # hb1 gains a vote, and the listing says so.
+        self.responses['hb1']['votes'].append(
+            _vote('v5', 'lower', ['c'], ['a', 'b']))
+        self.responses['bills'][0]['updated_at'] = '2014-02-01 00:00:00'
+        self.requests = []
+        cache = ResponseCache(self.fetch, self.path, refresh=['bills'])
+        builder = build(self.spec, cache=cache)
+        self.assertEquals(['bills', 'bill'], self.requests)
+        self.assertEquals(['v1', 'v5', 'v3', 'v4'], builder.vote_ids)
+
+        # The new version replaced the old one.
+        self.assertEquals(files, sorted(listdir(self.path)))
+        self.requests = []
+        builder = build(self.spec, cache=cache)
+        self.assertEquals(['bills'], self.requests)
+        self.assertEquals(['v1', 'v5', 'v3', 'v4'], builder.vote_ids)
+
+    def test_index(self):
+        index = join(self.path, 'index.json')
+        builder = RollcallBuilder.from_index(index, ['a', 'b', 'c'])
+        builder.add_vote(RESPONSES['hb3']['votes'][0])
+        builder.save_index(index)
+        self.assertEquals(['c', 'a', 'b'], builder.leg_ids)
+
+        # A later build keeps the rows and columns, and adds new ones at
+        # the end.
+        builder = RollcallBuilder.from_index(index, ['a', 'b', 'c'])
+        build(self.spec, fetch=self.fetch, builder=builder)
+        self.assertEquals(['c', 'a', 'b'], builder.leg_ids)
+        self.assertEquals(['v4', 'v1', 'v3'], builder.vote_ids)
+        votes = builder.get_rollcall(sparse=True).vote_matrix
+        self.assertEquals([1, 2, 3], list(votes['v4']))
+        self.assertNotIn('legislators', self.requests)
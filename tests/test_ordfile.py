@@ -0,0 +1,131 @@
+import shutil
+import tempfile
+from os.path import join, dirname, abspath
+from StringIO import StringIO
+from unittest import TestCase
+
+from pscl.utils import cd
+from pscl.ordfile import OrdFile, FIELD_WIDTHS
+
+
+class OrdFileTest(TestCase):
+
+    here = dirname(abspath(__file__))
+    with cd(join(here, 'fixtures')):
+        with open('hou112kh.ord') as f:
+            ordfile = OrdFile(f)
+            legislators, votes = ordfile.as_arrays()
+            voters = list(ordfile)
+            dataframe = ordfile.as_dataframe()
+
+    def test_shape(self):
+        expected = (len(self.voters), len(self.voters[0].votes))
+        self.assertEquals(expected, self.votes.shape)
+
+    def test_votes(self):
+        expected = [list(voter.votes) for voter in self.voters]
+        self.assertEquals(expected, self.votes.tolist())
+
+    def test_legislators(self):
+        for field, _ in FIELD_WIDTHS:
+            expected = [getattr(voter, field) for voter in self.voters]
+            self.assertEquals(expected, list(self.legislators[field]))
+
+    def test_dataframe(self):
+        names = [voter.name for voter in self.voters]
+        self.assertEquals(names, list(self.dataframe.index))
+        self.assertEquals(self.votes.tolist(), self.dataframe.values.tolist())
+
+    def test_blank_and_short_lines(self):
+        with open(join(self.here, 'fixtures', 'sen90kh.ord')) as f:
+            lines = [line.rstrip('\r\n') for line in f][:3]
+        expected = OrdFile(StringIO('\n'.join(lines))).as_arrays()
+
+        # A trailing blank line isn't a legislator.
+        legislators, votes = OrdFile(
+            StringIO('\n'.join(lines) + '\n\n')).as_arrays()
+        self.assertEquals(list(expected[0]['name']), list(legislators['name']))
+        self.assertEquals(expected[1].tolist(), votes.tolist())
+
+        # Nor is one in the middle, and short lines are padded with 0.
+        text = '%s\n\n%s\r\n%s\n' % (lines[0], lines[1][:-5], lines[2])
+        legislators, votes = OrdFile(StringIO(text)).as_arrays()
+        self.assertEquals(list(expected[0]['name']), list(legislators['name']))
+        self.assertEquals([0] * 5, votes[1, -5:].tolist())
+        self.assertEquals(expected[1][1, :-5].tolist(), votes[1, :-5].tolist())
+        self.assertEquals(expected[1][[0, 2]].tolist(), votes[[0, 2]].tolist())
+
+    def test_no_final_newline(self):
+        with open(join(self.here, 'fixtures', 'hou112kh.ord'), 'rb') as f:
+            text = f.read().rstrip('\r\n')
+        path = tempfile.mkdtemp()
+        try:
+            filename = join(path, 'unterminated.ord')
+            with open(filename, 'wb') as f:
+                f.write(text)
+            with OrdFile.from_path(filename, mmap=True) as ordfile:
+                # Still a view on the map rather than a copy.
+                self.assertFalse(ordfile.vote_bytes.flags.owndata)
+                legislators, votes = ordfile.as_arrays()
+                self.assertEquals(self.votes.tolist(), votes.tolist())
+                self.assertEquals(list(self.legislators['name']),
+                                  list(legislators['name']))
+        finally:
+            shutil.rmtree(path)
+
+        # The same when the last line is short.
+        legislators, votes = OrdFile(StringIO(text[:-5])).as_arrays()
+        self.assertEquals(self.votes[:-1].tolist(), votes[:-1].tolist())
+        self.assertEquals([0] * 5, votes[-1, -5:].tolist())
+        self.assertEquals(
+            self.votes[-1, :-5].tolist(), votes[-1, :-5].tolist())
+
+    def test_context_manager(self):
+        path = join(self.here, 'fixtures', 'sen90kh.ord')
+        for mmap in (True, False):
+            with OrdFile.from_path(path, mmap=mmap) as ordfile:
+                self.assertEquals(102, len(ordfile.as_arrays()[1]))
+            self.assertTrue(ordfile.fp.closed)
+
+    def test_from_path(self):
+        path = join(self.here, 'fixtures', 'hou112kh.ord')
+        ordfile = OrdFile.from_path(path, mmap=True)
+        try:
+            self.assertFalse(ordfile.vote_bytes.flags.owndata)
+            legislators, votes = ordfile.as_arrays()
+            self.assertEquals(self.votes.tolist(), votes.tolist())
+            self.assertEquals(
+                list(self.legislators['name']), list(legislators['name']))
+        finally:
+            ordfile.close()
+
+    def test_recode(self):
+        with open(join(self.here, 'fixtures', 'hou112kh.ord')) as f:
+            dataframe = OrdFile(f).as_dataframe(recode=True)
+        recoded = dataframe.values
+        for codes, value in ((1, 2, 3), 1), ((4, 5, 6), 6), ((7, 8, 9), 9):
+            for code in codes:
+                self.assertTrue((recoded[self.votes == code] == value).all())
+        self.assertTrue((recoded[self.votes == 0] == 0).all())
+
+    def test_iter_chunks(self):
+        with open(join(self.here, 'fixtures', 'hou112kh.ord')) as f:
+            chunks = list(OrdFile(f).iter_chunks(rows=100))
+        self.assertEquals([100, 100, 100, 100, 46], [len(v) for _, v in chunks])
+        votes = sum((v.tolist() for _, v in chunks), [])
+        self.assertEquals(self.votes.tolist(), votes)
+        index = sum((list(legislators.index) for legislators, _ in chunks), [])
+        self.assertEquals(list(range(len(self.votes))), index)
+
+    def test_iter_chunks_mmap(self):
+        path = join(self.here, 'fixtures', 'hou112kh.ord')
+        ordfile = OrdFile.from_path(path, mmap=True)
+        try:
+            totals, sizes = [], []
+            for _, votes in ordfile.iter_chunks(rows=100):
+                totals.extend(votes.sum(axis=1).tolist())
+                sizes.append(len(votes))
+            self.assertEquals(self.votes.sum(axis=1).tolist(), totals)
+            self.assertEquals([100, 100, 100, 100, 46], sizes)
+        finally:
+            ordfile.close()
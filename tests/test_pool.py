@@ -0,0 +1,69 @@
+from os.path import join, dirname, abspath
+from unittest import TestCase
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from pscl.pool import RPool, RPoolError
+from pscl.rollcall import Rollcall
+from pscl.wnominate import Wnominate
+from pscl.utils import cd
+
+
+class RPoolTest(TestCase):
+    '''Route requests to long-lived workers. These use the numpy engines,
+    which the workers run the same way as R requests.
+    '''
+    here = dirname(abspath(__file__))
+    with cd(join(here, 'fixtures')):
+        with open('sen90kh.ord') as f:
+            rollcall = Rollcall.from_ordfile(f, engine='numpy')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = RPool(workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_wnominate(self):
+        result = self.pool.wnominate(
+            self.rollcall, (2,), dims=1, engine='numpy')
+        self.assertTrue(isinstance(result, Wnominate))
+        self.assertEquals(102, len(result.legislators.coord1D))
+
+    def test_ideal(self):
+        result = self.pool.ideal(
+            self.rollcall, engine='numpy', maxiter=100, burnin=50, thin=10,
+            seed=0)
+        self.assertEquals(102, result.n)
+
+    def test_errors(self):
+        self.assertRaises(
+            RPoolError, self.pool.wnominate, self.rollcall, ('nobody',),
+            engine='numpy')
+        # The worker is still there afterwards.
+        self.assertEquals(102, self.pool.ideal(
+            self.rollcall, engine='numpy', maxiter=20, burnin=10, thin=10,
+            seed=0).n)
+
+    def test_sparse(self):
+        portable = self.rollcall.portable()
+        rollcall = Rollcall.from_portable(
+            dict(portable, votes=csr_matrix(portable['votes'])), 'numpy')
+        kwargs = dict(engine='numpy', maxiter=20, burnin=10, thin=10, seed=0)
+        np.testing.assert_allclose(
+            self.rollcall.ideal(**kwargs)['xbar'].values,
+            self.pool.ideal(rollcall, **kwargs)['xbar'].values)
+
+    def test_dead_worker(self):
+        pool = RPool(workers=1)
+        try:
+            process, _ = pool._idle.queue[0]
+            process.terminate()
+            process.join()
+            summary = pool.summary(self.rollcall, engine='numpy')
+            self.assertEquals((102,), summary.n)
+        finally:
+            pool.close()
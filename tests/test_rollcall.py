@@ -6,6 +6,7 @@ from rpy2.robjects.packages import importr
 
 from pscl.rollcall import Rollcall, RollcallSummary
 from pscl.ideal import ideal, Ideal
+from pscl.convert import to_python
 from pscl.utils import cd
 from pscl.ordfile import OrdFile
 
@@ -37,9 +38,31 @@ class RollcallTest(TestCase):
     def test_summary(self):
         self.assertEquals(self.expected_summary, self.summary)
 
+    def test_native_summary(self):
+        self.assertEquals(
+            self.expected_summary, self.rollcall.summary(engine='numpy'))
+
     def test_rollcall(self):
         self.assertEquals(self.expected_rollcall, self.rollcall)
 
+    def test_drop_unanimous(self):
+        # The rollcall is filtered in python, and drops the same roll calls
+        # as pscl's dropUnanimous.
+        for lop in (0, 3):
+            expected = Rollcall(rpscl.dropUnanimous(self.s109, lop=lop))
+            found = Rollcall(self.s109).drop_unanimous(lop=lop)
+            self.assertEquals(list(expected.vote_matrix.columns),
+                              list(found.vote_matrix.columns))
+            self.assertEquals(expected.vote_matrix.shape,
+                              found.vote_matrix.shape)
+
+    def test_legis_data(self):
+        # The VoterData fields come through R as a data.frame.
+        legis_data = to_python(self.rollcall['legis.data'])
+        self.assertEquals(
+            list(self.rollcall.legis_names), list(legis_data.index))
+        self.assertTrue('party_code' in legis_data.columns)
+
     # def test_ideal(self):
     #     '''
     #     Test the pscl `ideal` function against our wrapped version.
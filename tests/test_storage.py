@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+from os.path import join, dirname, abspath
+from unittest import TestCase
+
+import numpy as np
+from pandas import DataFrame
+
+from pscl.rollcall import Rollcall
+from pscl.utils import cd
+
+
+class RollcallStorageTest(TestCase):
+    '''Save rollcalls with Rollcall.save and load them back.
+    '''
+    here = dirname(abspath(__file__))
+    with cd(join(here, 'fixtures')):
+        with open('hou112kh.ord') as f:
+            rollcall = Rollcall.from_ordfile(f, engine='numpy')
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.rollcall.save(self.path)
+        self.loaded = Rollcall.load(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_votes(self):
+        expected = self.rollcall.vote_matrix
+        found = self.loaded.vote_matrix
+        self.assertEquals(np.int8, found.values.dtype)
+        self.assertTrue((expected.values == found.values).all())
+        self.assertEquals(list(expected.index), list(found.index))
+        self.assertEquals(list(expected.columns), list(found.columns))
+
+    def test_memory_mapped(self):
+        values = self.loaded.vote_matrix.values
+        while not isinstance(values, np.memmap):
+            values = values.base
+            self.assertTrue(values is not None)
+
+    def test_metadata(self):
+        self.assertEquals(self.rollcall.codes, self.loaded.codes)
+        expected = self.rollcall['legis.data']
+        found = self.loaded['legis.data']
+        self.assertEquals(list(expected.columns), list(found.columns))
+        self.assertEquals(list(expected['icpsr_id']), list(found['icpsr_id']))
+        self.assertEquals(list(expected['party_code']),
+                          list(found['party_code']))
+        self.assertEquals(None, self.loaded.get('vote.data'))
+
+    def test_observed_votes(self):
+        for expected, found in zip(self.rollcall.observed_votes(),
+                                   self.loaded.observed_votes()):
+            self.assertTrue((expected == found).all())
+
+    def test_votes_must_fit_int8(self):
+        rollcall = Rollcall.from_dataframe(
+            DataFrame([[1, 1000]]), engine='numpy')
+        self.assertRaises(ValueError, rollcall.save, self.path)
+
+    def test_nan_votes(self):
+        # NA is pscl's default code for missing votes.
+        votes = DataFrame([[1, 6, np.nan], [np.nan, 1, 6]],
+                          index=['a', 'b'], columns=['v1', 'v2', 'v3'])
+        rollcall = Rollcall.from_dataframe(
+            votes, engine='numpy', yea=1, nay=6, missing=np.nan)
+        rollcall.save(self.path)
+        loaded = Rollcall.load(self.path)
+        found = loaded.vote_matrix
+        self.assertEquals(
+            np.isnan(votes.values).tolist(), np.isnan(found.values).tolist())
+        self.assertEquals([1, 6, 1, 6], list(found.values[~np.isnan(
+            found.values)]))
+        self.assertEquals(['v1', 'v2', 'v3'], list(found.columns))
+        for expected, found in zip(rollcall.observed_votes(),
+                                   loaded.observed_votes()):
+            self.assertTrue((expected == found).all())
+
+    def test_nan_vote_is_reserved(self):
+        rollcall = Rollcall.from_dataframe(
+            DataFrame([[1, -128, np.nan]]), engine='numpy')
+        self.assertRaises(ValueError, rollcall.save, self.path)
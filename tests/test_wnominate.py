@@ -1,6 +1,7 @@
 from os.path import join, dirname, abspath
 from unittest import TestCase
 
+import numpy as np
 import rpy2.robjects as robjects
 from rpy2.robjects.packages import importr
 
@@ -60,3 +61,14 @@ class TestNomNom(TestCase):
         found_wnominate_summary = self.wnominate.summary()
         self.assertEquals(expected_wnominate_summary, found_wnominate_summary)
 
+    def test_native_engine(self):
+        native = self.rollcall.wnominate(polarity=(2, 5), engine='numpy')
+        for column in ('coord1D', 'coord2D'):
+            expected = np.asarray(getattr(
+                self.expected_wnominate.legislators, column), dtype=float)
+            found = np.asarray(native['legislators'][column], dtype=float)
+            kept = ~(np.isnan(expected) | np.isnan(found))
+            self.assertTrue(
+                np.corrcoef(expected[kept], found[kept])[0, 1] > 0.95)
+            self.assertTrue(
+                np.abs(expected[kept] - found[kept]).mean() < 0.1)
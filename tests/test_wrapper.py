@@ -0,0 +1,143 @@
+from unittest import TestCase
+
+import numpy as np
+from pandas import DataFrame, Series
+
+from pscl.base import Wrapper, SubWrapper
+from pscl.accessors import (
+    Accessor, VectorAccessor, ArrayAccessor, LabeledArrayAccessor)
+
+
+class CountingAccessor(VectorAccessor):
+    '''Counts how many times the value gets converted.
+    '''
+    calls = 0
+
+    def get_value(self, inst):
+        CountingAccessor.calls += 1
+        return VectorAccessor.get_value(self, inst)
+
+
+class Thing(Wrapper):
+    coords = CountingAccessor('coords')
+    eq_attrs = ('coords',)
+
+
+class WrapperTest(TestCase):
+
+    def setUp(self):
+        CountingAccessor.calls = 0
+
+    def test_memoized(self):
+        thing = Thing({'coords': [1.0, 2.0]})
+        for _ in range(10):
+            self.assertEquals((1.0, 2.0), thing.coords)
+        self.assertEquals(1, CountingAccessor.calls)
+
+    def test_per_instance(self):
+        thing1 = Thing({'coords': [1.0]})
+        thing2 = Thing({'coords': [2.0]})
+        self.assertEquals((1.0,), thing1.coords)
+        self.assertEquals((2.0,), thing2.coords)
+        self.assertEquals((1.0,), thing1.coords)
+
+    def test_invalidated(self):
+        thing = Thing({'coords': [1.0]})
+        self.assertEquals((1.0,), thing.coords)
+        thing.obj = {'coords': [3.0]}
+        self.assertEquals((3.0,), thing.coords)
+        self.assertEquals(2, CountingAccessor.calls)
+
+
+class Unconverted(Wrapper):
+    coords = Accessor('coords')
+
+
+class AccessorTest(TestCase):
+
+    def test_get_value_is_abstract(self):
+        thing = Unconverted({'coords': [1.0]})
+        self.assertRaises(NotImplementedError, lambda: thing.coords)
+
+
+class Child(SubWrapper):
+    key = 'child'
+    coords = CountingAccessor('coords')
+
+
+class Parent(Wrapper):
+    child = Child()
+
+
+class LazyMapping(dict):
+    '''Records which keys get looked up.
+    '''
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.lookups = []
+
+    def __getitem__(self, key):
+        self.lookups.append(key)
+        return dict.__getitem__(self, key)
+
+
+class LazyWrapperTest(TestCase):
+
+    def test_lazy(self):
+        obj = LazyMapping(a=1, b=2)
+        wrapper = Wrapper(obj)
+        self.assertEquals([], obj.lookups)
+        self.assertEquals(1, wrapper['a'])
+        self.assertEquals(1, wrapper['a'])
+        self.assertEquals(['a'], obj.lookups)
+        self.assertEquals(['a', 'b'], sorted(wrapper))
+        self.assertTrue('b' in wrapper)
+        self.assertFalse('c' in wrapper)
+        self.assertRaises(KeyError, lambda: wrapper['c'])
+
+    def test_subwrapper_per_instance(self):
+        parent1 = Parent({'child': {'coords': [1.0]}})
+        parent2 = Parent({'child': {'coords': [2.0]}})
+        self.assertTrue(parent1.child is parent1.child)
+        self.assertEquals((1.0,), parent1.child.coords)
+        self.assertEquals((2.0,), parent2.child.coords)
+        self.assertEquals((1.0,), parent1.child.coords)
+
+
+class Arrays(Wrapper):
+    x = ArrayAccessor('x')
+    xbar = LabeledArrayAccessor('xbar')
+    xbar_values = ArrayAccessor('xbar')
+    weights = LabeledArrayAccessor('weights')
+
+
+class ArrayAccessorTest(TestCase):
+    '''The array accessors on a python mapping, as native results are.
+    '''
+    def arrays(self):
+        return Arrays(dict(
+            x=np.arange(24.0).reshape(4, 3, 2),
+            xbar=DataFrame([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]],
+                           index=['a', 'b', 'c'], columns=['D1', 'D2']),
+            weights=Series([0.5, 0.25], index=['D1', 'D2'])))
+
+    def test_array(self):
+        arrays = self.arrays()
+        self.assertEquals((4, 3, 2), arrays.x.shape)
+        self.assertTrue(arrays.x is arrays.obj['x'])
+        self.assertEquals((3, 2), arrays.xbar_values.shape)
+        self.assertEquals([5.0, 6.0], list(arrays.xbar_values[2]))
+
+    def test_labeled_array(self):
+        arrays = self.arrays()
+        self.assertEquals(['a', 'b', 'c'], list(arrays.xbar.index))
+        self.assertEquals(['D1', 'D2'], list(arrays.xbar.columns))
+        self.assertEquals(4.0, arrays.xbar.loc['b', 'D2'])
+        self.assertEquals(['D1', 'D2'], list(arrays.weights.index))
+
+    def test_cached_per_accessor_type(self):
+        # xbar and xbar_values share a key but not a cached value.
+        arrays = self.arrays()
+        self.assertTrue(isinstance(arrays.xbar, DataFrame))
+        self.assertTrue(isinstance(arrays.xbar_values, np.ndarray))
+        self.assertTrue(arrays.xbar is arrays.xbar)